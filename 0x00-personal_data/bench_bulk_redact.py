@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Benchmark of bulk_redact over a generated users CSV (10M rows by default,
+pass another row count as first argument) for several worker counts
+"""
+import os
+import sys
+import tempfile
+import time
+from itertools import cycle, islice
+
+from filtered_logger import bulk_main
+
+
+def generate_csv(path: str, n_rows: int) -> None:
+    """writes n_rows rows cycled from user_data.csv to path"""
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "user_data.csv")
+    with open(source) as f:
+        header, *rows = f.readlines()
+    with open(path, "w") as f:
+        f.write(header)
+        f.writelines(islice(cycle(rows), n_rows))
+
+
+def main() -> None:
+    """runs the benchmark"""
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.csv")
+        generate_csv(path, n_rows)
+        for workers in (1, 2, 4, 8):
+            for chunk_size in (1000, 20000):
+                start = time.perf_counter()
+                with open(path) as source, open(os.devnull, "w") as sink:
+                    bulk_main(source, sink, workers, chunk_size)
+                secs = time.perf_counter() - start
+                print("{} workers chunk {:>6}: {:>10,.0f} rows/sec".format(
+                    workers, chunk_size, n_rows / secs))
+
+
+if __name__ == "__main__":
+    main()
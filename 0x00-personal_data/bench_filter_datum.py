@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of filter_datum: lines/sec for 5, 50 and 500 PII fields,
+compared with the original per-call compile + lambda implementation
+"""
+import re
+import timeit
+from typing import List
+
+from filtered_logger import filter_datum
+
+
+def legacy_filter_datum(
+    fields: List[str], redaction: str, message: str, separator: str
+) -> str:
+    """original filter_datum, kept here as the baseline"""
+    pattern = "|".join([f"{field}=[^\\{separator}]*" for field in fields])
+    return re.sub(
+        pattern,
+        lambda m: f"{m.group(0).split('=')[0]}={redaction}",
+        message
+    )
+
+
+def build_case(n_fields: int):
+    """returns (fields, message) with n_fields PII fields in the message"""
+    fields = ["field{}".format(i) for i in range(n_fields)]
+    message = "".join("{}=value{};".format(f, i) for i, f in enumerate(fields))
+    message += "ip=60ed:c396:2ff:244:bbd0:9208:26f2:93ea;"
+    return fields, message
+
+
+def main() -> None:
+    """runs the benchmark"""
+    for n_fields in (5, 50, 500):
+        fields, message = build_case(n_fields)
+        assert filter_datum(fields, "xxx", message, ";") == \
+            legacy_filter_datum(fields, "xxx", message, ";")
+        number = max(20, 20000 // n_fields)
+        for name, func in (("legacy", legacy_filter_datum),
+                           ("engine", filter_datum)):
+            secs = timeit.timeit(
+                lambda: func(fields, "xxx", message, ";"), number=number
+            )
+            print("{:>4} fields {:>7}: {:>12,.0f} lines/sec".format(
+                n_fields, name, number / secs))
+
+
+if __name__ == "__main__":
+    main()
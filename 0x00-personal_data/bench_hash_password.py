@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Benchmark of hash_passwords: hashes/sec against pool size and cost
+"""
+import time
+
+from encrypt_password import hash_passwords
+
+
+def main() -> None:
+    """runs the benchmark"""
+    for rounds in (4, 8, 10, 12):
+        n_passwords = max(8, 2 ** (16 - rounds))
+        passwords = ["MyAmazingPassw0rd{}".format(i)
+                     for i in range(n_passwords)]
+        for workers in (1, 2, 4, 8):
+            start = time.perf_counter()
+            hash_passwords(passwords, rounds, workers)
+            secs = time.perf_counter() - start
+            print("cost {:>2} workers {}: {:>10,.1f} hashes/sec".format(
+                rounds, workers, n_passwords / secs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark of caller-side latency of logger.info for the synchronous
+get_logger() against get_logger(queued=True)
+"""
+import logging
+import os
+import sys
+import time
+
+from filtered_logger import get_logger
+
+MESSAGE = ("name=Marlene Wood; email=hwestiii@att.net; phone=(473) 401-4253;"
+           " ssn=261-72-6780; password=K5?BMNv; ip=60ed:c396:2ff:244:bbd0;"
+           " last_login=2019-11-14 06:14:24; user_agent=Mozilla/5.0;")
+
+
+def reset(logger: logging.Logger) -> None:
+    """closes and detaches every handler of logger"""
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def measure(logger: logging.Logger, number: int) -> list:
+    """returns the sorted per-call latencies of logger.info in ns"""
+    latencies = []
+    for _ in range(number):
+        start = time.perf_counter_ns()
+        logger.info(MESSAGE)
+        latencies.append(time.perf_counter_ns() - start)
+    return sorted(latencies)
+
+
+def main() -> None:
+    """runs the benchmark"""
+    number = 50000
+    stderr, sys.stderr = sys.stderr, open(os.devnull, "w")
+    results = []
+    try:
+        for name, kwargs in (("sync", {}),
+                             ("queued", {"queued": True}),
+                             ("queued+drop", {"queued": True,
+                                              "queue_size": 1000,
+                                              "overflow": "drop"})):
+            logger = get_logger(**kwargs)
+            start = time.perf_counter()
+            latencies = measure(logger, number)
+            caller = time.perf_counter() - start
+            dropped = getattr(logger.handlers[0], "dropped", 0)
+            reset(logger)
+            drained = time.perf_counter() - start
+            results.append((name, latencies, caller, drained, dropped))
+    finally:
+        sys.stderr.close()
+        sys.stderr = stderr
+    for name, latencies, caller, drained, dropped in results:
+        print("{:>11}: p50 {:>6.1f}us p99 {:>6.1f}us caller {:.2f}s "
+              "drained {:.2f}s dropped {}".format(
+                  name, latencies[len(latencies) // 2] / 1000,
+                  latencies[int(len(latencies) * 0.99)] / 1000,
+                  caller, drained, dropped))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark of records/sec through a get_logger() logger fanned out to
+1, 3 and 10 handlers, compared with the original RedactingFormatter
+"""
+import io
+import logging
+import timeit
+from typing import List
+
+from filtered_logger import PII_FIELDS, RedactingFormatter, filter_datum
+from filtered_logger import get_logger
+
+
+class LegacyRedactingFormatter(logging.Formatter):
+    """original formatter: redacts record.msg in place on every format"""
+
+    REDACTION = RedactingFormatter.REDACTION
+    FORMAT = RedactingFormatter.FORMAT
+    SEPARATOR = RedactingFormatter.SEPARATOR
+
+    def __init__(self, fields: List[str]) -> None:
+        super(LegacyRedactingFormatter, self).__init__(self.FORMAT)
+        self.fields = fields
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.msg = filter_datum(
+            fields=self.fields,
+            redaction=self.REDACTION,
+            message=record.msg,
+            separator=self.SEPARATOR,
+        )
+        return super(LegacyRedactingFormatter, self).format(record=record)
+
+
+MESSAGE = ("name=Marlene Wood; email=hwestiii@att.net; phone=(473) 401-4253;"
+           " ssn=261-72-6780; password=K5?BMNv; ip=60ed:c396:2ff:244:bbd0;"
+           " last_login=2019-11-14 06:14:24; user_agent=Mozilla/5.0;")
+
+
+def fan_out(logger: logging.Logger, formatter_class, n_handlers: int):
+    """replaces the handlers of logger by n_handlers in-memory handlers"""
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    for _ in range(n_handlers):
+        handler = logging.StreamHandler(io.StringIO())
+        handler.setFormatter(formatter_class(list(PII_FIELDS)))
+        logger.addHandler(handler)
+
+
+def main() -> None:
+    """runs the benchmark"""
+    logger = get_logger()
+    number = 20000
+    for n_handlers in (1, 3, 10):
+        for name, formatter_class in (("legacy", LegacyRedactingFormatter),
+                                      ("cached", RedactingFormatter)):
+            fan_out(logger, formatter_class, n_handlers)
+            secs = timeit.timeit(lambda: logger.info(MESSAGE), number=number)
+            print("{:>2} handlers {:>6}: {:>10,.0f} records/sec".format(
+                n_handlers, name, number / secs))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,96 @@
 #!/usr/bin/env python3
 """module secures passwords"""
 
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+import os
+
 import bcrypt
 
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> bytes:
+    """
+    Hashes a pwd
 
-def hash_password(password: str) -> bytes:
-    """Hashes a pwd"""
-    salt = bcrypt.gensalt()
+    args:
+        password (str): clear password
+        rounds (int | None): bcrypt work factor (log2 of the number of
+            rounds), BCRYPT_ROUNDS if None
+
+    returns:
+        bytes : salted bcrypt hash
+    """
+    salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
     return bcrypt.hashpw(str.encode(password), salt)
 
 
+def hash_passwords(
+    passwords: Iterable[str],
+    rounds: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> List[bytes]:
+    """
+    Hashes many pwds on a thread pool, for bulk user imports; bcrypt
+    releases the GIL while hashing so threads run in parallel
+
+    args:
+        passwords (Iterable[str]): clear passwords
+        rounds (int | None): bcrypt work factor, BCRYPT_ROUNDS if None
+        workers (int | None): pool size, os.cpu_count() if None
+
+    returns:
+        List[bytes] : hashes in the same order as passwords
+    """
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda password: hash_password(password, rounds), passwords
+        ))
+
+
+def hash_rounds(hashed_password: bytes) -> int:
+    """returns the work factor a bcrypt hash was made with"""
+    return int(hashed_password.split(b"$")[2])
+
+
+def needs_rehash(hashed_password: bytes, rounds: Optional[int] = None) -> bool:
+    """
+    checks if a hash was made with another work factor than rounds
+
+    args:
+        hashed_password (bytes): stored bcrypt hash
+        rounds (int | None): wanted work factor, BCRYPT_ROUNDS if None
+    """
+    return hash_rounds(hashed_password) != (rounds or BCRYPT_ROUNDS)
+
+
 def is_valid(hashed_password: bytes, password: str) -> bool:
     """checks if pwd is valid"""
     return bcrypt.checkpw(str.encode(password), hashed_password)
+
+
+def verify_and_update(
+    hashed_password: bytes, password: str, rounds: Optional[int] = None
+) -> Tuple[bool, Optional[bytes]]:
+    """
+    checks if pwd is valid and, if so and the hash uses an outdated work
+    factor, rehashes it; the clear password is only known on login, so
+    that is when old hashes can be upgraded
+
+    args:
+        hashed_password (bytes): stored bcrypt hash
+        password (str): clear password to check
+        rounds (int | None): wanted work factor, BCRYPT_ROUNDS if None
+
+    returns:
+        (False, None) if pwd is not valid
+        (True, None) if pwd is valid and the hash is up to date
+        (True, new_hash) if pwd is valid and new_hash should be stored
+    """
+    if not is_valid(hashed_password, password):
+        return (False, None)
+    if needs_rehash(hashed_password, rounds):
+        return (True, hash_password(password, rounds))
+    return (True, None)
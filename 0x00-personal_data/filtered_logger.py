@@ -1,15 +1,95 @@
 #!/usr/bin/env python3
 
 """Module defines function that obufscates sensitive info"""
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from logging.handlers import QueueHandler, QueueListener
+from queue import Empty, Full, LifoQueue, Queue
+from typing import (
+    Any, Callable, ContextManager, Deque, Dict, Iterable, Iterator, List,
+    Optional, Pattern, Sequence, TextIO, Tuple
+)
+import copy
+import csv
 import re
 import os
+import sys
+import threading
 import logging
 from mysql.connector import MySQLConnection
 
 PII_FIELDS = ("name", "email", "phone", "ssn", "password")
 
 
+class RedactionEngine:
+    """
+    Compiles redaction patterns once per (fields, separator) pair and
+    keeps them in a bounded LRU cache
+
+    args:
+        maxsize (int): max number of compiled patterns kept around
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self._compile = lru_cache(maxsize=maxsize)(self._build_pattern)
+
+    @staticmethod
+    def _build_pattern(fields: Tuple[str, ...], separator: str) -> Pattern:
+        """builds the alternation `(f1|f2|...)=[^sep]*` for fields"""
+        alternation = "|".join(re.escape(field) for field in fields)
+        return re.compile(f"({alternation})=[^{re.escape(separator)}]*")
+
+    def pattern(self, fields: Sequence[str], separator: str) -> Pattern:
+        """returns the compiled pattern for fields and separator"""
+        return self._compile(tuple(fields), separator)
+
+    def redactor(
+        self, fields: Sequence[str], redaction: str, separator: str
+    ) -> Callable[[str], str]:
+        """
+        returns a callable that redacts fields out of a message
+
+        args:
+            fields (Sequence[str]): fields to be obfuscated
+            redaction (str): obfsuscation string
+            separator (str): character that separates fields in message
+
+        returns:
+            Callable[[str], str] : message -> obfuscated message
+        """
+        if not fields:
+            return str
+        tail = "=" + redaction
+        sub = self.pattern(fields, separator).sub
+
+        def redact(message: str) -> str:
+            """replaces matches with the captured field name + redaction"""
+            return sub(lambda match: match[1] + tail, message)
+
+        return redact
+
+    def redact(
+        self,
+        fields: Sequence[str],
+        redaction: str,
+        message: str,
+        separator: str,
+    ) -> str:
+        """returns message obfuscated as filter_datum does"""
+        return self.redactor(fields, redaction, separator)(message)
+
+    def cache_info(self):
+        """returns hit/miss statistics of the pattern cache"""
+        return self._compile.cache_info()
+
+
+_engine = RedactionEngine()
+
+
 def filter_datum(
     fields: List[str], redaction: str, message: str, separator: str
 ) -> str:
@@ -25,50 +105,602 @@ def filter_datum(
     returns:
         str : obfuscated message
     """
-    pattern = "|".join([f"{field}=[^\\{separator}]*" for field in fields])
-    return re.sub(
-        pattern,
-        lambda m: f"{m.group(0).split('=')[0]}={redaction}",
-        message
-    )
+    return _engine.redact(fields, redaction, message, separator)
+
 
+class FieldRedactor:
+    """
+    Redacts structured rows by field name instead of by regex
+
+    Values of PII fields are swapped for the redaction before the message
+    is built, so no pattern runs over the message. For values that do not
+    contain the separator the output is identical to running filter_datum
+    over the `k=v; ...;` message.
+
+    args:
+        fields (Sequence[str]): fields to be obfuscated
+        redaction (str): obfsuscation string
+        separator (str): character that ends each `k=v`
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        redaction: str = "***",
+        separator: str = ";",
+    ) -> None:
+        self.fields = frozenset(fields)
+        self.redaction = redaction
+        self.separator = separator
+        self.key = (tuple(fields), redaction, separator)
+
+    def redact(self, pairs: Iterable[Tuple[str, Any]]) -> str:
+        """
+        returns the `k=v; ...;` message for (field, value) pairs with the
+        values of self.fields redacted
+        """
+        fields, redaction, separator = \
+            self.fields, self.redaction, self.separator
+        return "".join(
+            f"{k}={redaction if k in fields else v}{separator} "
+            for k, v in pairs
+        ).strip()
+
+    def row_formatter(
+        self, columns: Sequence[str]
+    ) -> Callable[[Sequence[Any]], str]:
+        """
+        returns a function laying a row of columns out as a redacted
+        message; redaction is decided once per column, not per row
+        """
+        def escape(text: str) -> str:
+            return text.replace("{", "{{").replace("}", "}}")
+
+        template = "".join(
+            "{}={}{} ".format(
+                escape(column),
+                escape(self.redaction) if column in self.fields else "{}",
+                escape(self.separator),
+            )
+            for column in columns
+        ).strip()
+        keep = [i for i, column in enumerate(columns)
+                if column not in self.fields]
+        if not keep:
+            return lambda row: template
+        if len(keep) == 1:
+            index = keep[0]
+            return lambda row: template.format(row[index])
+        values = itemgetter(*keep)
+        return lambda row: template.format(*values(row))
 
-def get_logger() -> logging.Logger:
-    """returns a logger object"""
+    def extra(self, message: str) -> Dict[str, Any]:
+        """
+        returns the `extra` marking message as already redacted, so a
+        RedactingFormatter with the same fields skips its regex pass
+
+            logger.info(message, extra=redactor.extra(message))
+        """
+        return {"_redaction": (self.key, message, message)}
+
+
+def get_logger(
+    queued: bool = False,
+    queue_size: int = 10000,
+    overflow: str = "block",
+    batch_size: int = 0,
+) -> logging.Logger:
+    """
+    returns a logger object
+
+    args:
+        queued (bool): when True, records are handed to a bounded queue and
+            redacted/written by a background QueueListener instead of on
+            the caller's thread
+        queue_size (int): max number of records waiting in the queue
+        overflow (str): "block" to wait for room when the queue is full,
+            "drop" to discard the record (counted in handler.dropped)
+        batch_size (int): when > 0, formatted records are buffered and
+            written to the stream batch_size at a time
+
+    returns:
+        logging.Logger : the user_data logger
+    """
     user_data = logging.getLogger("user_data")
     user_data.setLevel(logging.INFO)
     formatter = RedactingFormatter(list(PII_FIELDS))
-    stream_handler = logging.StreamHandler()
+    if batch_size > 0:
+        stream_handler = BatchedStreamHandler(batch_size)
+    else:
+        stream_handler = logging.StreamHandler()
     stream_handler.setFormatter(formatter)
-    user_data.addHandler(stream_handler)
+    if queued:
+        user_data.addHandler(
+            RedactingQueueHandler(stream_handler, queue_size, overflow)
+        )
+    else:
+        user_data.addHandler(stream_handler)
     user_data.propagate = False
 
     return user_data
 
 
+class _BoundedQueueListener(QueueListener):
+    """QueueListener whose stop sentinel waits for room in a full queue"""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+class RedactingQueueHandler(QueueHandler):
+    """
+    QueueHandler feeding a background QueueListener that owns the real
+    handler, so redaction and I/O happen off the logging thread
+
+    args:
+        handler (logging.Handler): handler records are dispatched to
+        queue_size (int): max number of records waiting in the queue
+        overflow (str): "block" or "drop" when the queue is full
+    """
+
+    OVERFLOW_POLICIES = ("block", "drop")
+
+    def __init__(
+        self, handler: logging.Handler, queue_size: int, overflow: str
+    ) -> None:
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of "
+                             f"{self.OVERFLOW_POLICIES}, not {overflow!r}")
+        super(RedactingQueueHandler, self).__init__(Queue(queue_size))
+        self.block = overflow == "block"
+        self.dropped = 0
+        self.listener = _BoundedQueueListener(
+            self.queue, handler, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        snapshots args and exception text on the caller thread; the
+        message itself is left for the listener's formatter to redact
+        """
+        if not record.args and not record.exc_info:
+            return record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put(record, block=self.block)
+        except Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """drains the queue into the real handler and stops the listener"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super(RedactingQueueHandler, self).close()
+
+
+class BatchedStreamHandler(logging.StreamHandler):
+    """
+    StreamHandler that buffers formatted records and writes/flushes them
+    capacity at a time instead of once per record
+
+    args:
+        capacity (int): number of records per write
+        stream: stream written to, sys.stderr by default
+    """
+
+    def __init__(self, capacity: int, stream=None) -> None:
+        super(BatchedStreamHandler, self).__init__(stream)
+        self.capacity = capacity
+        self.buffer: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.buffer.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.capacity:
+            self.flush()
+
+    def flush(self) -> None:
+        """writes the buffered records then flushes the stream"""
+        self.acquire()
+        try:
+            if self.buffer:
+                self.stream.write("".join(self.buffer))
+                self.buffer = []
+            super(BatchedStreamHandler, self).flush()
+        finally:
+            self.release()
+
+
+def _db_config() -> Dict[str, Optional[str]]:
+    """returns the MySQLConnection arguments read from the environment"""
+    return {
+        "user": os.getenv("PERSONAL_DATA_DB_USERNAME"),
+        "password": os.getenv("PERSONAL_DATA_DB_PASSWORD"),
+        "host": os.getenv("PERSONAL_DATA_DB_HOST", "localhost"),
+        "database": os.getenv("PERSONAL_DATA_DB_NAME"),
+    }
+
+
 def get_db() -> MySQLConnection:
     """Returns a MySQLConnection object to connect to the database"""
-    username = os.getenv("PERSONAL_DATA_DB_USERNAME")
-    password = os.getenv("PERSONAL_DATA_DB_PASSWORD")
-    db_host = os.getenv("PERSONAL_DATA_DB_HOST", "localhost")
-    db_name = os.getenv("PERSONAL_DATA_DB_NAME")
-    return MySQLConnection(
-        user=username, password=password, host=db_host, database=db_name
-    )
+    return MySQLConnection(**_db_config())
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections
+
+    Idle connections are health checked when checked out and replaced if
+    they are dead. Once size connections are checked out, acquire waits
+    for one to be released.
+
+    args:
+        connect (Callable[[], Any]): opens a new connection
+        size (int): max number of connections open at once
+        timeout (float | None): seconds acquire waits for a free slot,
+            forever if None
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int = 5,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self._idle: LifoQueue = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @staticmethod
+    def is_healthy(connection: Any) -> bool:
+        """
+        returns whether connection is still usable
+
+        MySQLConnection.is_connected() pings the server; other drivers
+        (sqlite3, ...) get a `SELECT 1`.
+        """
+        try:
+            is_connected = getattr(connection, "is_connected", None)
+            if is_connected is not None:
+                return bool(is_connected())
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self) -> Any:
+        """
+        checks a connection out of the pool
+
+        returns:
+            a healthy connection, reused when possible
+
+        raises:
+            TimeoutError: no connection was released within self.timeout
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"no connection available after "
+                               f"{self.timeout}s (pool size {self.size})")
+        try:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except Empty:
+                    return self.connect()
+                if self.is_healthy(connection):
+                    return connection
+                _close_quietly(connection)
+        except BaseException:
+            self._slots.release()
+            raise
 
+    def release(self, connection: Any) -> None:
+        """
+        returns a connection acquired from this pool
 
-def main() -> None:
-    """main function"""
-    connection = get_db()
-    logger = get_logger()
+        Its open transaction is rolled back so no state reaches the next
+        borrower; a connection that fails to roll back is closed instead
+        of pooled.
+        """
+        try:
+            connection.rollback()
+        except Exception:
+            _close_quietly(connection)
+        else:
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """context manager checking a connection out for its block"""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self) -> None:
+        """closes every idle connection"""
+        while True:
+            try:
+                _close_quietly(self._idle.get_nowait())
+            except Empty:
+                return
+
+
+def _close_quietly(connection: Any) -> None:
+    """closes connection, ignoring errors from already dead ones"""
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pools: Dict[Tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(size: int = 5, timeout: Optional[float] = None) -> ConnectionPool:
+    """
+    returns the process-wide pool for the current PERSONAL_DATA_DB_* config
+
+    Pools are keyed by the environment config and the process id, so a
+    forked child never reuses its parent's sockets. size and timeout only
+    apply when the pool is created.
+    """
+    config = _db_config()
+    key = (os.getpid(),) + tuple(sorted(config.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # bound to the config of the key, not re-read on each connect
+            pool = ConnectionPool(lambda: MySQLConnection(**config), size,
+                                  timeout)
+            _pools[key] = pool
+        return pool
+
+
+def pooled_db(
+    size: int = 5, timeout: Optional[float] = None
+) -> ContextManager[Any]:
+    """
+    returns a context manager lending a pooled MySQLConnection
+
+        with pooled_db() as connection:
+            ...
+    """
+    return get_pool(size, timeout).connection()
+
+
+def column_names(cursor) -> Tuple[str, ...]:
+    """
+    returns the column names of the last query run on cursor
+
+    args:
+        cursor: a mysql.connector cursor, or any DB-API cursor such as
+            sqlite3's that only exposes description
+
+    returns:
+        Tuple[str, ...] : column names in select order
+    """
+    names = getattr(cursor, "column_names", None)
+    if names is None:
+        names = tuple(column[0] for column in cursor.description)
+    return tuple(names)
+
+
+def row_template(fields: Sequence[str]) -> str:
+    """
+    returns a str.format template laying a row out as `k=v; ...;`
+
+    args:
+        fields (Sequence[str]): column names
+
+    returns:
+        str : template with one positional `{}` per column
+    """
+    return "".join(
+        "{}={{}}; ".format(field.replace("{", "{{").replace("}", "}}"))
+        for field in fields
+    ).strip()
+
+
+def iter_users(
+    connection,
+    batch_size: int = 1000,
+    redactor: Optional[FieldRedactor] = None,
+) -> Iterator[List[str]]:
+    """
+    streams the users table as batches of `k=v; ...;` messages
+
+    Rows are read with fetchmany on an unbuffered cursor so only one batch
+    is held in memory at a time.
+
+    args:
+        connection: DB-API connection (MySQLConnection, sqlite3, ...)
+        batch_size (int): rows fetched per round trip
+        redactor (FieldRedactor | None): when given, messages come out
+            already redacted
+
+    returns:
+        Iterator[List[str]] : lists of at most batch_size messages
+    """
     cursor = connection.cursor()
-    cursor.execute("SELECT * FROM users")
-    fields = cursor.column_names
-    for row in cursor:
-        message = "".join("{}={}; ".format(k, v) for k, v in zip(fields, row))
-        logger.info(message.strip())
-    cursor.close()
-    connection.close()
+    try:
+        cursor.execute("SELECT * FROM users")
+        columns = column_names(cursor)
+        if redactor is not None:
+            format_row = redactor.row_formatter(columns)
+        else:
+            template = row_template(columns).format
+
+            def format_row(row: Sequence[Any]) -> str:
+                return template(*row)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [format_row(row) for row in rows]
+    finally:
+        cursor.close()
+
+
+def main(connection=None, batch_size: int = 0) -> None:
+    """
+    main function
+
+    args:
+        connection: DB-API connection to read from, a pooled get_db()
+            connection by default
+        batch_size (int): when > 0, stream the table batch_size rows at a
+            time and write the log output in batches of the same size
+    """
+    if connection is None:
+        with pooled_db() as connection:
+            return main(connection, batch_size)
+    if batch_size > 0:
+        logger = get_logger(batch_size=batch_size)
+        redactor = FieldRedactor(PII_FIELDS, RedactingFormatter.REDACTION,
+                                 RedactingFormatter.SEPARATOR)
+        for messages in iter_users(connection, batch_size, redactor):
+            for message in messages:
+                logger.info(message, extra=redactor.extra(message))
+        for handler in logger.handlers:
+            handler.flush()
+    else:
+        logger = get_logger()
+        cursor = connection.cursor()
+        cursor.execute("SELECT * FROM users")
+        fields = column_names(cursor)
+        for row in cursor:
+            message = "".join(
+                "{}={}; ".format(k, v) for k, v in zip(fields, row)
+            )
+            logger.info(message.strip())
+        cursor.close()
+
+
+def _redact_chunk(
+    lines: List[str], fields: Tuple[str, ...], header: Optional[List[str]]
+) -> str:
+    """
+    redacts one chunk of lines in a worker process
+
+    args:
+        lines (List[str]): `k=v; ...;` messages, or raw CSV rows when
+            header is given
+        fields (Tuple[str, ...]): fields to be obfuscated
+        header (List[str] | None): CSV column names
+
+    returns:
+        str : redacted lines, newline terminated
+    """
+    redact = _engine.redactor(
+        fields, RedactingFormatter.REDACTION, RedactingFormatter.SEPARATOR
+    )
+    if header is not None:
+        template = row_template(header).format
+        messages = (template(*row) for row in csv.reader(lines))
+    else:
+        messages = (line.rstrip("\n") for line in lines)
+    return "".join([redact(message) + "\n" for message in messages])
+
+
+def bulk_redact(
+    lines: Iterable[str],
+    sink: TextIO,
+    workers: Optional[int] = None,
+    chunk_size: int = 10000,
+    fields: Sequence[str] = PII_FIELDS,
+    header: Optional[List[str]] = None,
+) -> int:
+    """
+    redacts a stream of lines on a pool of processes, writing the results
+    to sink in input order
+
+    At most 2 * workers chunks are in flight, so memory stays bounded no
+    matter how long the input is. CSV input (header given) must not have
+    quoted fields spanning several lines.
+
+    args:
+        lines (Iterable[str]): input lines
+        sink (TextIO): where redacted lines are written
+        workers (int | None): number of processes, os.cpu_count() if None
+        chunk_size (int): lines sent to a worker at a time
+        fields (Sequence[str]): fields to be obfuscated
+        header (List[str] | None): CSV column names, when lines are CSV
+            rows to be laid out as `k=v; ...;` first
+
+    returns:
+        int : number of chunks written
+    """
+    workers = workers or os.cpu_count() or 1
+    lines = iter(lines)
+    chunks = iter(lambda: list(islice(lines, chunk_size)), [])
+    pending: Deque[Future] = deque()
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunks:
+            pending.append(
+                executor.submit(_redact_chunk, chunk, tuple(fields), header)
+            )
+            if len(pending) >= 2 * workers:
+                sink.write(pending.popleft().result())
+                written += 1
+        while pending:
+            sink.write(pending.popleft().result())
+            written += 1
+    return written
+
+
+def bulk_main(
+    source: Optional[TextIO] = None,
+    sink: Optional[TextIO] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 10000,
+) -> None:
+    """
+    redacts a users CSV dump (such as user_data.csv) read from source
+
+    args:
+        source (TextIO | None): CSV with a header line, sys.stdin if None
+        sink (TextIO | None): where `k=v; ...;` redacted lines are
+            written, sys.stdout if None
+        workers (int | None): number of processes, os.cpu_count() if None
+        chunk_size (int): rows sent to a worker at a time
+    """
+    source = source or sys.stdin
+    sink = sink or sys.stdout
+    lines = iter(source)
+    header = next(csv.reader([next(lines, "")]), None)
+    if not header:
+        return
+    bulk_redact(lines, sink, workers, chunk_size, header=header)
+    sink.flush()
 
 
 class RedactingFormatter(logging.Formatter):
@@ -81,12 +713,36 @@ class RedactingFormatter(logging.Formatter):
     def __init__(self, fields: List[str]) -> None:
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
-
-    def format(self, record: logging.LogRecord) -> str:
-        record.msg = filter_datum(
-            fields=self.fields,
-            redaction=self.REDACTION,
-            message=record.msg,
-            separator=self.SEPARATOR,
+        self._key = (tuple(fields), self.REDACTION, self.SEPARATOR)
+        self._redact = _engine.redactor(
+            fields, self.REDACTION, self.SEPARATOR
         )
-        return super(RedactingFormatter, self).format(record=record)
+
+    def redacted_message(self, record: logging.LogRecord) -> str:
+        """
+        returns the redacted message of record
+
+        The result is remembered on the record together with the redaction
+        settings and the message it was computed from, so other handlers
+        formatting the same record with the same settings reuse it instead
+        of redacting again. record.msg and record.args are left untouched.
+
+        args:
+            record (logging.LogRecord): record being formatted
+
+        returns:
+            str : record.getMessage() with self.fields obfuscated
+        """
+        message = record.getMessage()
+        cached = getattr(record, "_redaction", None)
+        if cached is not None and cached[0] == self._key \
+                and cached[1] == message:
+            return cached[2]
+        redacted = self._redact(message)
+        record._redaction = (self._key, message, redacted)
+        return redacted
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        """lays out the record around its redacted message"""
+        record.message = self.redacted_message(record)
+        return super(RedactingFormatter, self).formatMessage(record)
@@ -4,15 +4,24 @@ Route module for the API
 """
 from os import getenv
 from typing import Union
+from api.v1.auth.context import AuthMiddleware, AuthRequest, auth_context
 from api.v1.views import app_views
 from flask import Flask, jsonify, abort, request
 from flask_cors import CORS
 import os
 
 app = Flask(__name__)
+app.request_class = AuthRequest
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
 
+excluded_paths = (
+    "/api/v1/status/",
+    "/api/v1/unauthorized/",
+    "/api/v1/forbidden/",
+    "/api/v1/auth_session/login/",
+)
+
 auth = None
 auth_type = os.getenv("AUTH_TYPE")
 if auth_type == "auth":
@@ -33,25 +42,28 @@ elif auth_type == "session_exp_auth":
 
     auth = SessionExpAuth()
 
+# AUTH_BEFORE_ROUTING=1 resolves the user in a WSGI middleware, before
+# routing, instead of lazily from load() and the views
+if auth and os.getenv("AUTH_BEFORE_ROUTING") == "1":
+    app.wsgi_app = AuthMiddleware(app.wsgi_app, auth)
+
 
 @app.before_request
 def load():
-    """Parses request before handling it"""
-    excluded_paths = [
-        "/api/v1/status/",
-        "/api/v1/unauthorized/",
-        "/api/v1/forbidden/",
-        "/api/v1/auth_session/login/",
-    ]
+    """
+    Parses request before handling it: its auth context resolves the
+    user once, here for protected paths, else when a view reads
+    request.current_user
+    """
+    context = auth_context(request, auth)
     if auth and auth.require_auth(request.path, excluded_paths):
         if (
             auth.authorization_header(request) is None
             and auth.session_cookie(request) is None
         ):
             abort(401)
-        if not auth.current_user(request):
+        if not context.user:
             abort(403)
-    request.current_user = auth.current_user(request)
 
 
 @app.errorhandler(404)
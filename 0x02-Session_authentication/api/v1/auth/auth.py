@@ -2,30 +2,99 @@
 """
 Module defines authentication classes
 """
-from typing import List, Optional, Union
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Union
 from flask import Request
 from os import getenv
 from models.user import User
 
 
+class PathMatcher:
+    """
+    Excluded paths compiled once: a set of the exact paths and a trie of
+    the prefixes of the wildcard ones ("/api/v1/stat*"), trailing slashes
+    ignored on both sides. Decisions are memoised for the last
+    CACHE_SIZE paths.
+    """
+
+    CACHE_SIZE = 1024
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        """
+        compiles patterns
+
+        args:
+            patterns (list of str): excluded paths, "*" ending wildcards
+        """
+        self.patterns = tuple(patterns)
+        self.source: Optional[Sequence[str]] = None
+        self.exact = set()
+        self.trie: dict = {}
+        for pattern in self.patterns:
+            if pattern.endswith("/"):
+                pattern = pattern[:-1]
+            if pattern.endswith("*"):
+                node = self.trie
+                for char in pattern[:-1]:
+                    node = node.setdefault(char, {})
+                node[None] = True
+            else:
+                self.exact.add(pattern)
+        self.excluded = lru_cache(maxsize=self.CACHE_SIZE)(self._excluded)
+
+    def _excluded(self, path: str) -> bool:
+        """
+        returns if path matches an excluded pattern
+        """
+        if path.endswith("/"):
+            path = path[:-1]
+        if path in self.exact:
+            return True
+        node = self.trie
+        if None in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+
 class Auth:
     """Authentication Class"""
 
+    path_matcher: Optional[PathMatcher] = None
+
     def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
-        """returns if path requires authentication"""
+        """
+        returns if path requires authentication
+
+        excluded_paths is compiled into a PathMatcher, kept while the
+        same tuple, or a list with the same patterns, is passed
+        """
         if path is None or excluded_paths is None or len(excluded_paths) == 0:
             return True
-        if path.endswith("/"):
-            path = path[:-1]
-        for excluded_path in excluded_paths:
-            if excluded_path.endswith("/"):
-                excluded_path = excluded_path[:-1]
-            if excluded_path.endswith("*"):
-                if path.startswith(excluded_path[:-1]):
-                    return False
-            if path == excluded_path:
-                return False
-        return True
+        return not self._path_matcher(excluded_paths).excluded(path)
+
+    def _path_matcher(self, excluded_paths: Sequence[str]) -> PathMatcher:
+        """
+        returns the PathMatcher of excluded_paths, compiled if they changed
+        """
+        matcher = self.path_matcher
+        if (
+            matcher is not None
+            and excluded_paths is matcher.source
+            and isinstance(excluded_paths, tuple)
+        ):
+            return matcher
+        patterns = tuple(excluded_paths)
+        if matcher is None or patterns != matcher.patterns:
+            matcher = PathMatcher(patterns)
+        matcher.source = excluded_paths
+        self.path_matcher = matcher
+        return matcher
 
     def authorization_header(self, request):
         """
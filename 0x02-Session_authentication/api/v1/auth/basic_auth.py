@@ -2,15 +2,116 @@
 
 """Moduke defines a class BasicAuth"""
 
-from typing import Any, TypeVar, Union
+from typing import Any, Tuple, TypeVar, Union
 from api.v1.auth.auth import Auth
 from base64 import b64decode
+from collections import OrderedDict
+from hashlib import blake2b
+from os import getenv
 from models.user import User
+import secrets
+import threading
+import time
+
+
+class CredentialCache:
+    """
+    Bounded LRU cache of verified Authorization headers, with a TTL
+
+    A header is stored as its keyed BLAKE2b hash under a secret drawn per
+    process, mapped to the id of its user and the email and password hash
+    the user had when the credentials were checked: a hit whose user is
+    gone or has another email or password is dropped, so a password
+    change or a removal invalidates it. Plaintext credentials are never
+    kept.
+    """
+
+    def __init__(self, size: int, ttl: float) -> None:
+        """
+        instantiates an empty cache
+
+        args:
+            size (int): maximum number of headers kept
+            ttl (float): seconds a header stays valid
+        """
+        self.size = size
+        self.ttl = ttl
+        self.secret = secrets.token_bytes(32)
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, authorization_header: str) -> bytes:
+        """
+        returns the keyed hash of authorization_header
+        """
+        return blake2b(authorization_header.encode(), key=self.secret,
+                       digest_size=16).digest()
+
+    def get(self, authorization_header: str) -> Union[User, None]:
+        """
+        returns the user of a cached header still valid, else None
+
+        args:
+            authorization_header (str): the value of the Authorization header
+        """
+        key = self.key(authorization_header)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+        user_id, email, password, expires = entry
+        user = User.get(user_id)
+        if (
+            time.monotonic() >= expires
+            or user is None
+            or user.email != email
+            or user.password != password
+        ):
+            with self.lock:
+                if self.entries.get(key) is entry:
+                    del self.entries[key]
+            return None
+        return user
+
+    def put(self, authorization_header: str, user: User) -> None:
+        """
+        caches authorization_header as verified for user
+
+        args:
+            authorization_header (str): the value of the Authorization header
+            user (User): the user the credentials were checked against
+        """
+        key = self.key(authorization_header)
+        entry: Tuple[str, str, str, float] = (
+            user.id, user.email, user.password, time.monotonic() + self.ttl
+        )
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
 
 
 class BasicAuth(Auth):
     """class inherits from class Auth"""
 
+    def __init__(self) -> None:
+        """
+        instantiates BasicAuth, with a CredentialCache of
+        BASIC_AUTH_CACHE_SIZE headers (0, the default, disables it) valid
+        BASIC_AUTH_CACHE_TTL seconds (60 by default)
+        """
+        super().__init__()
+        self.credential_cache = None
+        try:
+            size = int(getenv("BASIC_AUTH_CACHE_SIZE", "0"))
+            ttl = float(getenv("BASIC_AUTH_CACHE_TTL", "60"))
+        except ValueError:
+            size = 0
+        if size > 0:
+            self.credential_cache = CredentialCache(size, ttl)
+
     def extract_base64_authorization_header(
         self, authorization_header: Union[str, Any]
     ) -> Union[str, None]:
@@ -99,7 +200,7 @@ class BasicAuth(Auth):
         ):
             return None
         try:
-            users = User.search({"email": user_email})
+            users = list(User.query({"email": user_email}, limit=1))
         except Exception:
             return None
         if (
@@ -124,6 +225,11 @@ class BasicAuth(Auth):
         authorization_header = self.authorization_header(request)
         if not authorization_header:
             return None
+        cache = self.credential_cache
+        if cache is not None and isinstance(authorization_header, str):
+            user = cache.get(authorization_header)
+            if user is not None:
+                return user
         base64_authorization_header = self.extract_base64_authorization_header(
             authorization_header
         )
@@ -137,6 +243,9 @@ class BasicAuth(Auth):
         user_credentials = self.extract_user_credentials(decoded_base64)
         if user_credentials == (None, None):
             return None
-        return self.user_object_from_credentials(
+        user = self.user_object_from_credentials(
             user_credentials[0], user_credentials[1]
         )
+        if user is not None and cache is not None:
+            cache.put(authorization_header, user)
+        return user
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Module defines the authentication context of a request
+"""
+from typing import Any, Callable, Iterable, Union
+from flask import Request
+from models.user import User
+
+ENVIRON_KEY = "api.v1.auth_context"
+UNRESOLVED = object()
+
+
+class AuthContext:
+    """
+    The user of one request, resolved by auth.current_user at most once,
+    when first read
+    """
+
+    def __init__(self, auth: Any, request: Request) -> None:
+        """
+        instantiates an unresolved context
+
+        args:
+            auth (Auth): the authentication of the API, None if disabled
+            request (flask.Request): the request to authenticate
+        """
+        self.auth = auth
+        self.request = request
+        self._user = UNRESOLVED
+
+    @property
+    def user(self) -> Union[User, None]:
+        """
+        returns the user of the request, None if anonymous
+        """
+        if self._user is UNRESOLVED:
+            if self.auth is None:
+                self._user = None
+            else:
+                self._user = self.auth.current_user(self.request)
+        return self._user
+
+    @user.setter
+    def user(self, user: Union[User, None]) -> None:
+        """
+        sets the user of the request
+        """
+        self._user = user
+
+
+def auth_context(request: Request, auth: Any = None) -> AuthContext:
+    """
+    returns the context of request, kept in its WSGI environ so that one
+    created before routing is found again by the views
+
+    args:
+        request (flask.Request): the request
+        auth (Auth): the authentication used if the context is created now
+    """
+    context = request.environ.get(ENVIRON_KEY)
+    if context is None:
+        context = AuthContext(auth, request)
+        request.environ[ENVIRON_KEY] = context
+    return context
+
+
+class AuthRequest(Request):
+    """
+    Request whose current_user reads the auth context
+    """
+
+    @property
+    def current_user(self) -> Union[User, None]:
+        """
+        returns the user of the request, resolved once
+        """
+        return auth_context(self).user
+
+    @current_user.setter
+    def current_user(self, user: Union[User, None]) -> None:
+        """
+        sets the user of the request
+        """
+        auth_context(self).user = user
+
+
+class AuthMiddleware:
+    """
+    WSGI middleware authenticating requests before Flask routes them
+    """
+
+    def __init__(self, wsgi_app: Callable, auth: Any) -> None:
+        """
+        wraps wsgi_app
+
+        args:
+            wsgi_app: the WSGI application, e.g. app.wsgi_app
+            auth (Auth): the authentication of the API
+        """
+        self.wsgi_app = wsgi_app
+        self.auth = auth
+
+    def __call__(self, environ: dict,
+                 start_response: Callable) -> Iterable[bytes]:
+        """
+        resolves the user of the request, then runs the application
+        """
+        auth_context(AuthRequest(environ), self.auth).user
+        return self.wsgi_app(environ, start_response)
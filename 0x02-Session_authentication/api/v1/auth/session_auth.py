@@ -4,9 +4,12 @@
 Module defines class SessionAuth that inherits from Auth
 """
 
-from typing import Dict, Optional, Union
+from typing import Optional, Union
 
 from api.v1.auth.auth import Auth
+from api.v1.auth.session_store import (
+    SessionStore, SessionStoreFull, get_session_store
+)
 import uuid
 
 from models.user import User
@@ -17,7 +20,15 @@ class SessionAuth(Auth):
     Class for Session Authentication
     """
 
-    user_id_by_session_id: Dict = {}
+    session_duration = 0
+
+    def __init__(self) -> None:
+        """
+        instantiates SessionAuth on the session store of the process
+        (SESSION_STORE, see api.v1.auth.session_store)
+        """
+        super().__init__()
+        self.store: SessionStore = get_session_store()
 
     def create_session(self, user_id: Optional[str]) -> Union[str, None]:
         """
@@ -27,13 +38,18 @@ class SessionAuth(Auth):
             user_id (str): user id starting session
 
         return:
-            None if user_id is None or user_id not str
+            None if user_id is None or user_id not str or the session
+            store is full
             else session_id (str) stringified uuid.UUID obj
         """
         if user_id is None or not isinstance(user_id, str):
             return None
         session_id = str(uuid.uuid4())
-        SessionAuth.user_id_by_session_id[session_id] = user_id
+        ttl = self.session_duration if self.session_duration > 0 else None
+        try:
+            self.store.set(session_id, user_id, ttl)
+        except SessionStoreFull:
+            return None
         return session_id
 
     def user_id_for_session_id(self, session_id: Optional[str]):
@@ -49,7 +65,7 @@ class SessionAuth(Auth):
         """
         if session_id is None or not isinstance(session_id, str):
             return None
-        return SessionAuth.user_id_by_session_id.get(session_id)
+        return self.store.get(session_id)
 
     def current_user(self, request=None) -> Union[User, None]:
         """
@@ -77,8 +93,4 @@ class SessionAuth(Auth):
         session_id = self.session_cookie(request)
         if not session_id:
             return False
-        user_id = self.user_id_for_session_id(session_id)
-        if not user_id:
-            return False
-        del SessionAuth.user_id_by_session_id[session_id]
-        return True
+        return self.store.delete(session_id)
@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+"""
+Module defines the session stores of SessionAuth
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from os import getenv
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+import heapq
+import os
+import sqlite3
+import stat
+import struct
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def monotonic_ms() -> int:
+    """returns the monotonic clock in integer milliseconds"""
+    return time.monotonic_ns() // 1000000
+
+
+def epoch_ms() -> int:
+    """returns the wall clock in integer milliseconds since the epoch"""
+    return time.time_ns() // 1000000
+
+
+def to_ms(seconds: float) -> int:
+    """returns seconds in integer milliseconds"""
+    return int(seconds * 1000)
+
+
+class SessionStoreFull(Exception):
+    """
+    Raised by set when a store has no room left for a session
+    """
+
+
+class SessionStore(ABC):
+    """
+    Interface of a store of session id -> user id, each session with an
+    optional time to live. Stores keep time as integer milliseconds of
+    their clock.
+    """
+
+    @abstractmethod
+    def set(self, session_id: str, user_id: str,
+            ttl: Optional[float] = None) -> None:
+        """
+        stores a session
+
+        args:
+            session_id (str): the session id
+            user_id (str): the id of the user of the session
+            ttl (float): seconds before the session expires, None for never
+        """
+
+    @abstractmethod
+    def get(self, session_id: str) -> Union[str, None]:
+        """
+        returns the user id of a session, None if unknown or expired
+        """
+
+    @abstractmethod
+    def touch(self, session_id: str, ttl: float,
+              interval: float) -> Union[str, None]:
+        """
+        returns the user id of a session like get, and slides its expiry
+        to ttl from now when it was last slid interval or more ago: at
+        most one write per session per interval
+
+        args:
+            session_id (str): the session id
+            ttl (float): seconds the session lives after an access
+            interval (float): minimum seconds between two writes
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """
+        deletes a session, returns whether it existed
+        """
+
+    @abstractmethod
+    def evict(self) -> int:
+        """
+        deletes the expired sessions, returns how many
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """
+        returns the number of sessions not evicted yet
+        """
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessions of this process in a dict, expiring through a min-heap of
+    (expiry, session id): every call first pops the expired heap heads,
+    O(log n) each. Heap entries of deleted or slid sessions are skipped
+    when they come out.
+    """
+
+    def __init__(self, clock: Callable[[], int] = monotonic_ms) -> None:
+        """
+        instantiates an empty store
+
+        args:
+            clock (callable): returns the current time in milliseconds
+        """
+        self.clock = clock
+        self.sessions: Dict[str, Tuple[str, Optional[int]]] = {}
+        self.expiries: List[Tuple[int, str]] = []
+        self.lock = threading.Lock()
+
+    def set(self, session_id: str, user_id: str,
+            ttl: Optional[float] = None) -> None:
+        """stores a session"""
+        now = self.clock()
+        expires = None if ttl is None else now + to_ms(ttl)
+        with self.lock:
+            self._evict(now)
+            self.sessions[session_id] = (user_id, expires)
+            if expires is not None:
+                heapq.heappush(self.expiries, (expires, session_id))
+
+    def get(self, session_id: str) -> Union[str, None]:
+        """returns the user id of a session, None if unknown or expired"""
+        now = self.clock()
+        with self.lock:
+            if self.expiries and self.expiries[0][0] <= now:
+                self._evict(now)
+            session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        return session[0]
+
+    def touch(self, session_id: str, ttl: float,
+              interval: float) -> Union[str, None]:
+        """returns the user id of a session and slides its expiry"""
+        now = self.clock()
+        ttl_ms = to_ms(ttl)
+        with self.lock:
+            if self.expiries and self.expiries[0][0] <= now:
+                self._evict(now)
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            user_id, expires = session
+            if expires is not None and (
+                expires - ttl_ms + to_ms(interval) <= now
+            ):
+                expires = now + ttl_ms
+                self.sessions[session_id] = (user_id, expires)
+                heapq.heappush(self.expiries, (expires, session_id))
+        return user_id
+
+    def delete(self, session_id: str) -> bool:
+        """deletes a session, returns whether it existed"""
+        with self.lock:
+            self._evict(self.clock())
+            return self.sessions.pop(session_id, None) is not None
+
+    def evict(self) -> int:
+        """deletes the expired sessions, returns how many"""
+        with self.lock:
+            return self._evict(self.clock())
+
+    def _evict(self, now: int) -> int:
+        """deletes the sessions expired at now, lock held"""
+        evicted = 0
+        while self.expiries and self.expiries[0][0] <= now:
+            expires, session_id = heapq.heappop(self.expiries)
+            session = self.sessions.get(session_id)
+            if session is not None and session[1] == expires:
+                del self.sessions[session_id]
+                evicted += 1
+        return evicted
+
+    def __len__(self) -> int:
+        """returns the number of sessions not evicted yet"""
+        return len(self.sessions)
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Sessions in a sqlite database file, shared by every process (e.g.
+    gunicorn workers) using the same path and kept across restarts.
+    Expiries are wall clock epoch milliseconds, as they outlive the
+    process, indexed: expired sessions are never returned and deleted by
+    an index range scan every EVICT_EVERY sets. Each thread of each
+    process has its own connection.
+    """
+
+    EVICT_EVERY = 1000
+
+    def __init__(self, path: str,
+                 clock: Callable[[], int] = epoch_ms) -> None:
+        """
+        opens or creates the database
+
+        args:
+            path (str): the database file
+            clock (callable): returns the current epoch in milliseconds
+        """
+        self.path = path
+        self.clock = clock
+        self.local = threading.local()
+        self.sets = 0
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, "
+            "expires_at INTEGER)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_expires_at "
+            "ON sessions (expires_at)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """returns the connection of the current thread and process"""
+        connection = getattr(self.local, "connection", None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30,
+                                         isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def set(self, session_id: str, user_id: str,
+            ttl: Optional[float] = None) -> None:
+        """stores a session"""
+        expires = None if ttl is None else self.clock() + to_ms(ttl)
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+            (session_id, user_id, expires),
+        )
+        self.sets += 1
+        if self.sets % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def get(self, session_id: str) -> Union[str, None]:
+        """returns the user id of a session, None if unknown or expired"""
+        row = self._connection().execute(
+            "SELECT user_id FROM sessions WHERE session_id = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (session_id, self.clock()),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def touch(self, session_id: str, ttl: float,
+              interval: float) -> Union[str, None]:
+        """
+        returns the user id of a session and slides its expiry, reading
+        only unless the expiry is due to slide
+        """
+        now = self.clock()
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT user_id, expires_at FROM sessions WHERE session_id = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (session_id, now),
+        ).fetchone()
+        if row is None:
+            return None
+        user_id, expires = row
+        ttl_ms = to_ms(ttl)
+        if expires is not None and expires - ttl_ms + to_ms(interval) <= now:
+            connection.execute(
+                "UPDATE sessions SET expires_at = MAX(expires_at, ?) "
+                "WHERE session_id = ?",
+                (now + ttl_ms, session_id),
+            )
+        return user_id
+
+    def delete(self, session_id: str) -> bool:
+        """deletes a session, returns whether it existed"""
+        cursor = self._connection().execute(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+        )
+        return cursor.rowcount > 0
+
+    def evict(self) -> int:
+        """deletes the expired sessions, returns how many"""
+        cursor = self._connection().execute(
+            "DELETE FROM sessions WHERE expires_at <= ?", (self.clock(),)
+        )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        """returns the number of sessions not evicted yet"""
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM sessions"
+        ).fetchone()[0]
+
+
+def check_private(fd: int, what: str) -> None:
+    """
+    raises PermissionError unless fd is owned by the current user and
+    accessible to nobody else, so another local user cannot have planted
+    or tampered with it
+
+    args:
+        fd (int): an open file descriptor
+        what (str): its description for the error
+    """
+    info = os.fstat(fd)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(
+            "{} is not private to uid {} (owner {}, mode {:o})".format(
+                what, os.getuid(), info.st_uid, stat.S_IMODE(info.st_mode)))
+
+
+def private_dir() -> str:
+    """
+    returns a directory only the current user can write to:
+    XDG_RUNTIME_DIR, else a 0700 directory of the user in the temporary
+    directory, created if needed
+    """
+    runtime_dir = getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return runtime_dir
+    directory = os.path.join(tempfile.gettempdir(),
+                             "api_v1_sessions-{}".format(os.getuid()))
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise PermissionError("{} is not private to uid {}".format(
+            directory, os.getuid()))
+    return directory
+
+
+class SharedMemorySessionStore(SessionStore):
+    """
+    Sessions in a fixed-size hash table in shared memory, seen by every
+    process of the host attaching the same name (e.g. gunicorn workers)
+    without an external service. The segment outlives the processes
+    until unlink is called or the host restarts.
+
+    The table is split into stripes, independent open-addressing
+    (linear probing) tables of fixed-width slots, each guarded by its
+    own lock: a byte-range fcntl lock on a lock file between processes,
+    released by the system if a process dies, taken under a threading
+    lock between the threads of a process. A slot holds its state, the
+    session and user ids null-padded to ID_SIZE bytes and the expiry in
+    milliseconds of the monotonic clock, shared by the processes of a
+    host (0 for never). Expired sessions are never returned and are
+    freed by evict, or by set when their stripe is full.
+
+    As a slot maps any session id to any user id, the segment and the
+    lock file (in private_dir) must belong to the current user with mode
+    0600: a table created by someone else is refused, not attached.
+    """
+
+    MAGIC = b"SESSHT01"
+    ID_SIZE = 40
+    EMPTY, USED, DELETED = 0, 1, 2
+    # magic, number of stripes, slots per stripe
+    HEADER = struct.Struct("<8sQQ")
+    # used and deleted slots of a stripe
+    COUNTS = struct.Struct("<QQ")
+    # state, session id, user id, expiry
+    SLOT = struct.Struct("<B{0}s{0}sq".format(ID_SIZE))
+    EXPIRES = struct.Struct("<q")
+
+    def __init__(self, name: str, capacity: int = 131072, stripes: int = 64,
+                 clock: Callable[[], int] = monotonic_ms) -> None:
+        """
+        attaches the table called name, creating it if needed
+
+        args:
+            name (str): the name of the shared memory segment
+            capacity (int): number of slots of a new table
+            stripes (int): number of locks of a new table
+            clock (callable): returns the current time in milliseconds
+        """
+        if fcntl is None:
+            raise RuntimeError("shared session store requires fcntl")
+        self.name = name
+        self.clock = clock
+        self.lock_path = os.path.join(private_dir(), name + ".lock")
+        self.lock_fd = os.open(
+            self.lock_path,
+            os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0),
+            0o600,
+        )
+        try:
+            check_private(self.lock_fd, self.lock_path)
+            self._attach(name, capacity, stripes)
+        except BaseException:
+            os.close(self.lock_fd)
+            raise
+        self.thread_locks = [threading.Lock() for _ in range(self.stripes)]
+
+    def _attach(self, name: str, capacity: int, stripes: int) -> None:
+        """attaches the segment called name, creating it if needed"""
+        span = -(-capacity // stripes)
+        size = (self.HEADER.size + stripes * self.COUNTS.size
+                + stripes * span * self.SLOT.size)
+        # byte 0 of the lock file guards creation, byte i + 1 stripe i
+        fcntl.lockf(self.lock_fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            try:
+                shm = shared_memory.SharedMemory(name, create=True, size=size)
+                self.HEADER.pack_into(shm.buf, 0, self.MAGIC, stripes, span)
+            except FileExistsError:
+                shm = shared_memory.SharedMemory(name)
+        finally:
+            fcntl.lockf(self.lock_fd, fcntl.LOCK_UN, 1, 0)
+        # attaching processes must not unlink the segment when they exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        try:
+            check_private(shm._fd, "shared memory segment " + name)
+            if shm.size < self.HEADER.size:
+                raise ValueError("{} is not a session table".format(name))
+            magic, stripes, span = self.HEADER.unpack_from(shm.buf, 0)
+            size = (self.HEADER.size + stripes * self.COUNTS.size
+                    + stripes * span * self.SLOT.size)
+            if magic != self.MAGIC or size > shm.size:
+                raise ValueError("{} is not a session table".format(name))
+        except BaseException:
+            shm.close()
+            raise
+        self.shm = shm
+        self.buf = shm.buf
+        self.stripes, self.span = stripes, span
+        self.counts_offset = self.HEADER.size
+        self.slots_offset = self.HEADER.size + self.stripes * self.COUNTS.size
+
+    @contextmanager
+    def _locked(self, stripe: int, exclusive: bool = True) -> Iterator[None]:
+        """holds the lock of stripe"""
+        with self.thread_locks[stripe]:
+            mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            fcntl.lockf(self.lock_fd, mode, 1, stripe + 1)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.lock_fd, fcntl.LOCK_UN, 1, stripe + 1)
+
+    def _key(self, session_id: str) -> Optional[Tuple[bytes, int, int]]:
+        """
+        returns the padded id, stripe and first probed slot of an id,
+        None if it does not fit a slot, so it cannot be stored
+        """
+        key = session_id.encode()
+        if len(key) > self.ID_SIZE:
+            return None
+        digest = zlib.crc32(key)
+        return (key.ljust(self.ID_SIZE, b"\0"), digest % self.stripes,
+                (digest // self.stripes) % self.span)
+
+    def _find(self, key: bytes, stripe: int, start: int) -> Tuple[int, int]:
+        """
+        returns the offsets of the slot of key and of the first free slot
+        of its probe sequence, -1 if none, stripe lock held
+        """
+        buf = self.buf
+        size = self.SLOT.size
+        base = self.slots_offset + stripe * self.span * size
+        free = -1
+        for position in range(start, start + self.span):
+            offset = base + (position % self.span) * size
+            state = buf[offset]
+            if state == self.EMPTY:
+                return -1, offset if free < 0 else free
+            if state == self.DELETED:
+                if free < 0:
+                    free = offset
+            elif buf[offset + 1:offset + 1 + self.ID_SIZE] == key:
+                return offset, free
+        return -1, free
+
+    def _count(self, stripe: int, used: int, deleted: int) -> None:
+        """adds to the counts of stripe, lock held"""
+        offset = self.counts_offset + stripe * self.COUNTS.size
+        old_used, old_deleted = self.COUNTS.unpack_from(self.buf, offset)
+        self.COUNTS.pack_into(self.buf, offset, old_used + used,
+                              old_deleted + deleted)
+
+    def set(self, session_id: str, user_id: str,
+            ttl: Optional[float] = None) -> None:
+        """
+        stores a session, SessionStoreFull if its stripe is full,
+        ValueError if an id does not fit a slot
+        """
+        hashed = self._key(session_id)
+        if hashed is None:
+            raise ValueError("session id longer than {} bytes".format(
+                self.ID_SIZE))
+        key, stripe, start = hashed
+        value = user_id.encode()
+        if len(value) > self.ID_SIZE:
+            raise ValueError("user id longer than {} bytes".format(
+                self.ID_SIZE))
+        now = self.clock()
+        expires = 0 if ttl is None else now + to_ms(ttl)
+        with self._locked(stripe):
+            offset, free = self._find(key, stripe, start)
+            if offset < 0 and free < 0:
+                self._evict_stripe(stripe, now)
+                offset, free = self._find(key, stripe, start)
+            if offset < 0:
+                if free < 0:
+                    raise SessionStoreFull("session table stripe full")
+                offset = free
+                deleted = -1 if self.buf[offset] == self.DELETED else 0
+                self._count(stripe, 1, deleted)
+            self.SLOT.pack_into(self.buf, offset, self.USED, key, value,
+                                expires)
+
+    def get(self, session_id: str) -> Union[str, None]:
+        """returns the user id of a session, None if unknown or expired"""
+        hashed = self._key(session_id)
+        if hashed is None:
+            return None
+        key, stripe, start = hashed
+        now = self.clock()
+        with self._locked(stripe, exclusive=False):
+            offset = self._find(key, stripe, start)[0]
+            if offset < 0:
+                return None
+            _, _, user_id, expires = self.SLOT.unpack_from(self.buf, offset)
+        if expires and expires <= now:
+            return None
+        return user_id.rstrip(b"\0").decode()
+
+    def touch(self, session_id: str, ttl: float,
+              interval: float) -> Union[str, None]:
+        """returns the user id of a session and slides its expiry"""
+        hashed = self._key(session_id)
+        if hashed is None:
+            return None
+        key, stripe, start = hashed
+        now = self.clock()
+        ttl_ms = to_ms(ttl)
+        with self._locked(stripe):
+            offset = self._find(key, stripe, start)[0]
+            if offset < 0:
+                return None
+            _, _, user_id, expires = self.SLOT.unpack_from(self.buf, offset)
+            if expires and expires <= now:
+                return None
+            if expires and expires - ttl_ms + to_ms(interval) <= now:
+                self.EXPIRES.pack_into(self.buf,
+                                       offset + 1 + 2 * self.ID_SIZE,
+                                       now + ttl_ms)
+        return user_id.rstrip(b"\0").decode()
+
+    def delete(self, session_id: str) -> bool:
+        """deletes a session, returns whether it existed"""
+        hashed = self._key(session_id)
+        if hashed is None:
+            return False
+        key, stripe, start = hashed
+        now = self.clock()
+        with self._locked(stripe):
+            offset = self._find(key, stripe, start)[0]
+            if offset < 0:
+                return False
+            expires = self.EXPIRES.unpack_from(
+                self.buf, offset + 1 + 2 * self.ID_SIZE)[0]
+            self._free(stripe, offset)
+        return not expires or expires > now
+
+    def _free(self, stripe: int, offset: int, rehash: bool = True) -> None:
+        """frees the slot at offset, rehashing stripe when a quarter of
+        its slots are deleted if rehash, lock held"""
+        size = self.SLOT.size
+        base = self.slots_offset + stripe * self.span * size
+        following = base + ((offset - base) // size + 1) % self.span * size
+        # a slot followed by an empty one ends no probe sequence
+        if self.buf[following] == self.EMPTY:
+            self.buf[offset] = self.EMPTY
+            self._count(stripe, -1, 0)
+        else:
+            self.buf[offset] = self.DELETED
+            self._count(stripe, -1, 1)
+        if rehash:
+            self._maybe_rehash(stripe)
+
+    def _maybe_rehash(self, stripe: int) -> None:
+        """rehashes stripe when a quarter of its slots are deleted, lock
+        held"""
+        counts = self.counts_offset + stripe * self.COUNTS.size
+        if self.COUNTS.unpack_from(self.buf, counts)[1] > self.span // 4:
+            self._rehash(stripe)
+
+    def _rehash(self, stripe: int) -> None:
+        """rewrites the sessions of stripe without deleted slots, lock
+        held"""
+        size = self.SLOT.size
+        base = self.slots_offset + stripe * self.span * size
+        end = base + self.span * size
+        sessions = [
+            self.SLOT.unpack_from(self.buf, offset)
+            for offset in range(base, end, size)
+            if self.buf[offset] == self.USED
+        ]
+        self.buf[base:end] = bytes(end - base)
+        for state, key, user_id, expires in sessions:
+            start = (zlib.crc32(key.rstrip(b"\0")) // self.stripes) % self.span
+            offset = self._find(key, stripe, start)[1]
+            self.SLOT.pack_into(self.buf, offset, state, key, user_id,
+                                expires)
+        self.COUNTS.pack_into(self.buf,
+                              self.counts_offset + stripe * self.COUNTS.size,
+                              len(sessions), 0)
+
+    def _evict_stripe(self, stripe: int, now: int) -> int:
+        """frees the expired sessions of stripe, lock held"""
+        size = self.SLOT.size
+        base = self.slots_offset + stripe * self.span * size
+        evicted = 0
+        for offset in range(base, base + self.span * size, size):
+            if self.buf[offset] != self.USED:
+                continue
+            expires = self.EXPIRES.unpack_from(
+                self.buf, offset + 1 + 2 * self.ID_SIZE)[0]
+            if expires and expires <= now:
+                self._free(stripe, offset, rehash=False)
+                evicted += 1
+        self._maybe_rehash(stripe)
+        return evicted
+
+    def evict(self) -> int:
+        """deletes the expired sessions, returns how many"""
+        evicted = 0
+        for stripe in range(self.stripes):
+            with self._locked(stripe):
+                evicted += self._evict_stripe(stripe, self.clock())
+        return evicted
+
+    def __len__(self) -> int:
+        """returns the number of sessions not evicted yet"""
+        return sum(
+            self.COUNTS.unpack_from(
+                self.buf, self.counts_offset + stripe * self.COUNTS.size)[0]
+            for stripe in range(self.stripes)
+        )
+
+    def unlink(self) -> None:
+        """destroys the table for every process"""
+        # SharedMemory.unlink unregisters the segment from the tracker
+        resource_tracker.register(self.shm._name, "shared_memory")
+        self.shm.unlink()
+        os.unlink(self.lock_path)
+
+
+_stores: Dict[Tuple[str, str], SessionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """
+    returns the session store of the process for SESSION_STORE: "memory"
+    (default), "sqlite", in the SESSION_STORE_PATH file
+    (.db_sessions.sqlite3 by default), or "shared", the shared memory
+    table SESSION_STORE_NAME (api_v1_sessions by default) of
+    SESSION_STORE_CAPACITY slots (131072 by default)
+    """
+    kind = getenv("SESSION_STORE", "memory")
+    if kind == "sqlite":
+        path = getenv("SESSION_STORE_PATH", ".db_sessions.sqlite3")
+    elif kind == "shared":
+        path = getenv("SESSION_STORE_NAME", "api_v1_sessions")
+    else:
+        path = ""
+    key = (kind, path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if kind == "sqlite":
+                store = SqliteSessionStore(path)
+            elif kind == "shared":
+                capacity = int(getenv("SESSION_STORE_CAPACITY", "131072"))
+                store = SharedMemorySessionStore(path, capacity)
+            elif kind == "memory":
+                store = MemorySessionStore()
+            else:
+                raise ValueError("unknown SESSION_STORE {}".format(kind))
+            _stores[key] = store
+    return store
@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 """ Module of Index views
 """
-from flask import jsonify, abort
+from flask import Response, jsonify, abort, request
 from api.v1.views import app_views
+from os import getenv
+import hashlib
+import json
+import time
+
+
+STATS_TTL = float(getenv("STATS_TTL", "1"))
+STATS_CACHE = (0.0, b"", "")
 
 
 @app_views.route("/status", methods=["GET"], strict_slashes=False)
@@ -18,13 +26,22 @@ def status() -> str:
 def stats() -> str:
     """GET /api/v1/stats
     Return:
-      - the number of each objects
+      - the number of each objects, and their counters, computed at most
+        once per STATS_TTL seconds
+      - 304 if the ETag sent in If-None-Match is still the current one
     """
-    from models.user import User
-
-    stats = {}
-    stats["users"] = User.count()
-    return jsonify(stats)
+    from models.base import collect_stats
+
+    global STATS_CACHE
+    expires, body, etag = STATS_CACHE
+    if time.monotonic() >= expires:
+        body = json.dumps(collect_stats(), sort_keys=True).encode()
+        etag = hashlib.sha1(body).hexdigest()
+        STATS_CACHE = (time.monotonic() + STATS_TTL, body, etag)
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.max_age = int(STATS_TTL)
+    return response.make_conditional(request)
 
 
 @app_views.route("/unauthorized", strict_slashes=False)
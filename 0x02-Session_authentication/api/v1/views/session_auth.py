@@ -20,7 +20,7 @@ def login():
     if not password:
         return jsonify({"error": "password missing"}), 400
     try:
-        users = User.search({"email": email})
+        users = list(User.query({"email": email}, limit=1))
     except Exception:
         return jsonify({"error": "no user found for this email"}), 404
     if len(users) == 0:
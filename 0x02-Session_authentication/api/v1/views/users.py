@@ -2,18 +2,55 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import Response, abort, jsonify, request
+from models.query import Range
 from models.user import User
+from urllib.parse import urlencode
 
 
 @app_views.route("/users", methods=["GET"], strict_slashes=False)
 def view_all_users() -> str:
     """GET /api/v1/users
+    Query parameters (optional):
+      - limit: number of users per page, sorted by ID
+      - after: ID of the last user of the previous page
+      - stream: 1 to send the JSON array chunk by chunk
     Return:
-      - list of all User objects JSON represented
+      - list of User objects JSON represented, with a `Link` header to the
+        next page when limit is given, more users follow and stream is not
+      - 400 if limit is not a positive integer
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    limit = request.args.get("limit")
+    after = request.args.get("after")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+    where = {}
+    order_by = None
+    if limit is not None or after is not None:
+        order_by = "id"
+    if after is not None:
+        # after + "\0" is the first string greater than after
+        where["id"] = Range(after + "\0")
+    if request.args.get("stream") == "1":
+        users = User.query(where, order_by, limit)
+        return Response(User.iter_json_bytes(users),
+                        mimetype="application/json")
+    if limit is None:
+        return Response(User.to_json_bytes(User.query(where, order_by)),
+                        mimetype="application/json")
+    users = list(User.query(where, order_by, limit + 1))
+    response = Response(User.to_json_bytes(users[:limit]),
+                        mimetype="application/json")
+    if len(users) > limit:
+        response.headers["Link"] = '<{}?{}>; rel="next"'.format(
+            request.base_url,
+            urlencode({"limit": limit, "after": users[limit - 1].id}))
+    return response
 
 
 @app_views.route("/users/me", methods=["GET"], strict_slashes=False)
@@ -22,6 +59,8 @@ def authenticated_user() -> User:
     Return
       - retrieves the authenticated User object
     """
+    if request.current_user is None:
+        abort(404)
     return jsonify(request.current_user.to_json())
 
 
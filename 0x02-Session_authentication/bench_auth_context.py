@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+""" Benchmark of the per-request cost of authentication under basic auth
+at 100k users (pass other sizes as arguments), through the Flask test
+client: GET /api/v1/users/me (authenticated) and GET /api/v1/status
+(excluded path) with credentials
+"""
+import base64
+import os
+import sys
+import tempfile
+import time
+
+os.environ["AUTH_TYPE"] = "basic_auth"
+os.chdir(tempfile.mkdtemp())
+
+from api.v1.app import app  # noqa: E402
+from models.base import DATA  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def load(client, url: str, headers: dict, requests: int = 5000) -> None:
+    """ prints the mean duration of GET url """
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+    elapsed = (time.perf_counter() - start) / requests
+    print("  {:<20} {:>8.1f}us/request".format(url, elapsed * 1e6))
+
+
+def main() -> None:
+    """ runs the benchmark """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000]
+    client = app.test_client()
+    credentials = base64.b64encode(b"bob@hbtn.io:H0lbertonSchool98!")
+    headers = {"Authorization": "Basic " + credentials.decode()}
+    for size in sizes:
+        DATA["User"] = {}
+        for i in range(size):
+            user = User(email="user{}@hbtn.io".format(i))
+            DATA["User"][user.id] = user
+        bob = User(email="bob@hbtn.io")
+        bob.password = "H0lbertonSchool98!"
+        DATA["User"][bob.id] = bob
+        User._reindex()
+        print("{} users".format(size))
+        load(client, "/api/v1/users/me", headers)
+        load(client, "/api/v1/status", headers)
+
+
+if __name__ == "__main__":
+    main()
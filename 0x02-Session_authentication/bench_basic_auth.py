@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+""" Load test of basic auth through the Flask test client: requests/sec
+of GET /api/v1/users/me at 100k users (pass other sizes as arguments),
+without and with the verified-credential cache
+"""
+import base64
+import os
+import sys
+import tempfile
+import time
+
+os.environ["AUTH_TYPE"] = "basic_auth"
+os.chdir(tempfile.mkdtemp())
+
+import api.v1.app  # noqa: E402
+from api.v1.auth.basic_auth import CredentialCache  # noqa: E402
+from models.base import DATA  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def load(client, label: str, headers: dict, requests: int = 5000) -> None:
+    """ prints the requests/sec of GET /api/v1/users/me """
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get("/api/v1/users/me", headers=headers)
+        assert response.status_code == 200
+    elapsed = time.perf_counter() - start
+    print("  {:<10} {:>8.0f} req/s".format(label, requests / elapsed))
+
+
+def main() -> None:
+    """ runs the load test """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000]
+    client = api.v1.app.app.test_client()
+    credentials = base64.b64encode(b"bob@hbtn.io:H0lbertonSchool98!")
+    headers = {"Authorization": "Basic " + credentials.decode()}
+    for size in sizes:
+        DATA["User"] = {}
+        for i in range(size):
+            user = User(email="user{}@hbtn.io".format(i))
+            DATA["User"][user.id] = user
+        bob = User(email="bob@hbtn.io")
+        bob.password = "H0lbertonSchool98!"
+        DATA["User"][bob.id] = bob
+        User._reindex()
+        print("{} users".format(size))
+        api.v1.app.auth.credential_cache = None
+        load(client, "no cache", headers)
+        api.v1.app.auth.credential_cache = CredentialCache(10000, 60)
+        load(client, "cache", headers)
+
+
+if __name__ == "__main__":
+    main()
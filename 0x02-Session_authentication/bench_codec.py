@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+""" Benchmark of User.save_to_file() / User.load_from_file() for each
+STORAGE_CODEC, at 100k and 1M users (pass other sizes as arguments)
+"""
+import os
+import sys
+import tempfile
+import time
+
+import models.base
+from models.base import DATA
+from models.codec import CODECS
+from models.user import User
+
+
+def main() -> None:
+    """ runs the benchmark """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    os.chdir(tempfile.mkdtemp())
+    for size in sizes:
+        User.load_from_file()
+        for i in range(size):
+            user = User(email="user{}@hbtn.io".format(i),
+                        first_name="Bob", last_name="Dylan")
+            user.password = "H0lbertonSchool98!"
+            DATA["User"][user.id] = user
+        for name, codec in CODECS.items():
+            models.base.STORAGE_CODEC = name
+            start = time.perf_counter()
+            User.save_to_file()
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            User.load_from_file()
+            loaded = time.perf_counter() - start
+            assert User.count() == size
+            file_size = os.path.getsize(User._file_path())
+            os.remove(User._file_path())
+            print("{:>8} users {:>6}: save {:>6.2f}s load {:>6.2f}s "
+                  "{:>6.1f} MB".format(size, name, saved, loaded,
+                                       file_size / 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+""" Multi-threaded load benchmark of User.save(): saves/sec and p99
+latency with direct writes against the write-behind coalescer (durable
+and async acknowledgement), in file and journal storage modes
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import models.base
+from models.base import DATA
+from models.user import User
+
+N_USERS = 1000
+N_THREADS = 16
+SAVES_PER_THREAD = 20
+
+
+def run(users: list, durable: bool) -> tuple:
+    """ Return (saves/sec, p99 latency in ms) of N_THREADS threads saving
+    SAVES_PER_THREAD users each
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(offset: int):
+        mine = []
+        for user in users[offset::N_THREADS][:SAVES_PER_THREAD]:
+            start = time.perf_counter()
+            user.save(durable=durable)
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=worker, args=(i,))
+               for i in range(N_THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    coalescer = models.base.get_coalescer()
+    if coalescer is not None:
+        coalescer.flush()
+    secs = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / secs, latencies[int(len(latencies) * .99)] * 1e3
+
+
+def main() -> None:
+    """ runs the benchmark """
+    window = float(sys.argv[1]) if len(sys.argv) > 1 else 0.005
+    os.chdir(tempfile.mkdtemp())
+    for mode in ("file", "journal"):
+        models.base.STORAGE_MODE = mode
+        User.load_from_file()
+        for i in range(N_USERS):
+            user = User(email="user{}@hbtn.io".format(i))
+            DATA["User"][user.id] = user
+        User.save_to_file()
+        users = list(DATA["User"].values())
+        for name, write_behind, durable in (("direct", 0, True),
+                                            ("durable", window, True),
+                                            ("async", window, False)):
+            models.base.WRITE_BEHIND_WINDOW = write_behind
+            models.base.COALESCER = None
+            saves, p99 = run(users, durable)
+            print("{:>7} {:>7}: {:>9,.0f} saves/sec p99 {:>8.2f}ms".format(
+                mode, name, saves, p99))
+
+
+if __name__ == "__main__":
+    main()
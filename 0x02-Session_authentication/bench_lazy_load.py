@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+""" Benchmark of the cold start of User.load_from_file() from a binary
+file, eager vs LAZY_LOAD=1: load time, peak RSS, then the time of 1000
+User.get and User.search by email (pass the number of users, 1M by
+default). Each load runs in a fresh process so peak RSS is its own
+"""
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def load(mode: str) -> None:
+    """ loads the file of the current directory and prints the figures """
+    import models.base
+    from models.base import DATA
+    from models.user import User
+
+    models.base.STORAGE_CODEC = "binary"
+    models.base.LAZY_LOAD = mode == "lazy"
+    start = time.perf_counter()
+    User.load_from_file()
+    loaded = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    ids = random.sample(list(DATA["User"].keys()), 1000)
+    start = time.perf_counter()
+    for obj_id in ids:
+        user = User.get(obj_id)
+        assert User.search({"email": user.email})[0].id == obj_id
+    looked_up = time.perf_counter() - start
+    print("{:>8} users {:>5}: load {:>6.2f}s peak RSS {:>7.1f} MB "
+          "1000 get+search {:>6.3f}s".format(User.count(), mode, loaded,
+                                             rss, looked_up))
+
+
+def main() -> None:
+    """ runs the benchmark """
+    if len(sys.argv) > 2 and sys.argv[1] == "--load":
+        load(sys.argv[2])
+        return
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(tempfile.mkdtemp())
+    import models.base
+    from models.base import DATA
+    from models.user import User
+
+    models.base.STORAGE_CODEC = "binary"
+    User.load_from_file()
+    for i in range(size):
+        user = User(email="user{}@hbtn.io".format(i),
+                    first_name="Bob", last_name="Dylan")
+        user.password = "H0lbertonSchool98!"
+        DATA["User"][user.id] = user
+    User.save_to_file()
+    DATA.clear()
+    env = dict(os.environ, PYTHONPATH=here)
+    for mode in ("eager", "lazy"):
+        subprocess.run([sys.executable, os.path.join(here, __file__),
+                        "--load", mode], env=env, check=True)
+    os.remove(User._file_path())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+""" Benchmark of the memory held by User objects in DATA: bytes per user
+measured with tracemalloc over 100k users (pass other sizes as arguments)
+"""
+import sys
+import tracemalloc
+
+from models.base import DATA
+from models.user import User
+
+
+def main() -> None:
+    """ runs the benchmark """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000]
+    DATA["User"] = {}
+    ids = ["{:036d}".format(i) for i in range(max(sizes))]
+    emails = ["user{}@hbtn.io".format(i) for i in range(max(sizes))]
+    for size in sizes:
+        DATA["User"].clear()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(size):
+            user = User(id=ids[i], email=emails[i],
+                        first_name="Bob", last_name="Dylan")
+            user.password = "H0lbertonSchool98!"
+            DATA["User"][user.id] = user
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        print("{:>8} users: {:>6.1f} bytes per user".format(
+            size, used / size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+""" Benchmark of User.query against User.search + sorting/slicing the
+list, at 100k users (pass other sizes as arguments): first page by
+email (sort-free index walk), email prefix, page sorted on a non indexed
+attribute, and the basic-auth lookup by email
+"""
+import sys
+import time
+from itertools import islice
+
+from models.base import DATA
+from models.query import Prefix
+from models.user import User
+
+
+def timed(label: str, function, repeat: int = 10) -> None:
+    """ prints the mean duration of function() """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    elapsed = (time.perf_counter() - start) / repeat
+    print("  {:<44} {:>10.1f}us".format(label, elapsed * 1e6))
+
+
+def main() -> None:
+    """ runs the benchmark """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000]
+    for size in sizes:
+        DATA["User"] = {}
+        for i in range(size):
+            user = User(email="user{}@hbtn.io".format(i),
+                        first_name="Bob{}".format(i % 1000),
+                        last_name="Dylan")
+            DATA["User"][user.id] = user
+        User._reindex()
+        email = "user{}@hbtn.io".format(size // 2)
+        print("{} users".format(size))
+        timed("search + sort by email, first 20",
+              lambda: sorted(User.search(),
+                             key=lambda user: user.email)[:20], 3)
+        timed("query order_by email, limit 20",
+              lambda: list(User.query(order_by="email", limit=20)))
+        timed("search + filter email prefix",
+              lambda: [user for user in User.search()
+                       if user.email.startswith("user4242")], 3)
+        timed("query Prefix email",
+              lambda: list(User.query({"email": Prefix("user4242")})))
+        timed("search + sort by first_name, first 20",
+              lambda: sorted(User.search(),
+                             key=lambda user: user.first_name)[:20], 3)
+        timed("query order_by first_name, limit 20",
+              lambda: list(User.query(order_by="first_name", limit=20)), 3)
+        timed("search email (basic auth)",
+              lambda: User.search({"email": email}), 1000)
+        timed("query email, limit 1 (basic auth)",
+              lambda: list(User.query({"email": email}, limit=1)), 1000)
+        timed("query all, projection id/email, first 20 of islice",
+              lambda: list(islice(User.query(fields=("id", "email")), 20)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+""" Benchmark of User.search({"email": ...}) through the email index
+against a full linear scan, at 10k, 100k and 1M users (pass other sizes
+as arguments)
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+from models.base import DATA
+from models.user import User
+
+
+def linear_search(attributes: dict) -> list:
+    """ Search as done before indexes: filter over every User """
+    return [obj for obj in DATA["User"].values()
+            if all(getattr(obj, k) == v for k, v in attributes.items())]
+
+
+def main() -> None:
+    """ runs the benchmark """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    os.chdir(tempfile.mkdtemp())
+    for size in sizes:
+        User.load_from_file()
+        for i in range(size):
+            user = User(email="user{}@hbtn.io".format(i))
+            DATA["User"][user.id] = user
+        User._reindex()
+        target = {"email": "user{}@hbtn.io".format(size - 1)}
+        assert User.search(target) == linear_search(target)
+        number = 20
+        linear = timeit.timeit(lambda: linear_search(target), number=number)
+        indexed = timeit.timeit(lambda: User.search(target), number=number)
+        print("{:>8} users: linear {:>9.1f}us indexed {:>6.1f}us".format(
+            size, linear / number * 1e6, indexed / number * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+""" Benchmark of the session stores at 1M sessions (pass other sizes as
+arguments): memory used, set/get throughput, sliding expiry (touch)
+coalesced to one write per 60s and written on every access, and eviction
+of every session once expired, against the former SessionExpAuth dict of
+{"user_id", "created_at"} dicts, which never evicted
+"""
+from datetime import datetime
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from api.v1.auth.session_store import MemorySessionStore, SqliteSessionStore
+
+
+class Clock:
+    """ settable clock, in milliseconds """
+
+    def __init__(self) -> None:
+        """ starts at 0 """
+        self.now = 0
+
+    def __call__(self) -> int:
+        """ returns the current time """
+        return self.now
+
+
+def rate(count: int, start: float) -> str:
+    """ returns count / elapsed as operations per second """
+    return "{:>10.0f}/s".format(count / (time.perf_counter() - start))
+
+
+def bench_dict(ids: list, user_id: str) -> None:
+    """ former SessionExpAuth storage """
+    tracemalloc.start()
+    sessions = {}
+    start = time.perf_counter()
+    for session_id in ids:
+        sessions[session_id] = {"user_id": user_id,
+                                "created_at": datetime.now()}
+    set_rate = rate(len(ids), start)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("  dict    {:>6.1f} B/session  set {}  evict never".format(
+        size / len(ids), set_rate))
+
+
+def bench_store(name: str, store, ids: list, user_id: str,
+                traced: bool) -> None:
+    """ fills store with ids expiring in an hour, reads them, slides
+    them a second later, evicts them """
+    clock = store.clock = Clock()
+    if traced:
+        tracemalloc.start()
+    start = time.perf_counter()
+    for session_id in ids:
+        store.set(session_id, user_id, 3600)
+    set_rate = rate(len(ids), start)
+    if traced:
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    else:
+        size = os.path.getsize(store.path)
+    gets = ids[::10]
+    start = time.perf_counter()
+    for session_id in gets:
+        assert store.get(session_id) == user_id
+    get_rate = rate(len(gets), start)
+    clock.now = 1000
+    touch_rates = []
+    for interval in (60, 0):
+        start = time.perf_counter()
+        for session_id in gets:
+            assert store.touch(session_id, 3600, interval) == user_id
+        touch_rates.append(rate(len(gets), start))
+    clock.now = 3601 * 1000
+    start = time.perf_counter()
+    assert store.evict() == len(ids)
+    evict_rate = rate(len(ids), start)
+    assert len(store) == 0
+    print("  {:<7} {:>6.1f} B/session  set {}  get {}  touch/60s {}  "
+          "touch/0s {}  evict {}".format(name, size / len(ids), set_rate,
+                                         get_rate, *touch_rates, evict_rate))
+
+
+def main() -> None:
+    """ runs the benchmark """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000]
+    user_id = str(uuid.uuid4())
+    for size in sizes:
+        print("{} sessions".format(size))
+        ids = [str(uuid.uuid4()) for _ in range(size)]
+        bench_dict(ids, user_id)
+        bench_store("memory", MemorySessionStore(), ids, user_id, True)
+        path = os.path.join(tempfile.mkdtemp(), "sessions.sqlite3")
+        bench_store("sqlite", SqliteSessionStore(path), ids, user_id, False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+""" Benchmark of the session stores shared between processes, across 1, 4
+and 8 processes (pass other counts as arguments): 100k sessions are
+created, then every process runs 50k operations (90% get of a session of
+any process, 10% set), reporting the aggregate throughput of the shared
+memory table against the sqlite store
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from api.v1.auth.session_store import (
+    SharedMemorySessionStore,
+    SqliteSessionStore,
+)
+
+SESSIONS = 100000
+OPERATIONS = 50000
+
+
+def work(open_store, ids: list, seed: int, barrier, results) -> None:
+    """ runs OPERATIONS on a store opened in this process """
+    store = open_store()
+    rnd = random.Random(seed)
+    picks = [rnd.choice(ids) for _ in range(OPERATIONS)]
+    barrier.wait()
+    start = time.perf_counter()
+    for i, session_id in enumerate(picks):
+        if i % 10:
+            assert store.get(session_id) is not None
+        else:
+            store.set(session_id, "user-{}".format(seed), 3600)
+    results.put(time.perf_counter() - start)
+
+
+def run(name: str, open_store, ids: list, processes: int) -> None:
+    """ prints the throughput of processes workers on a store """
+    barrier = multiprocessing.Barrier(processes)
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=work,
+                                args=(open_store, ids, i, barrier, results))
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    elapsed = max(results.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    print("  {:<7} {} processes {:>10.0f} ops/s".format(
+        name, processes, processes * OPERATIONS / elapsed))
+
+
+def main() -> None:
+    """ runs the benchmark """
+    counts = [int(arg) for arg in sys.argv[1:]] or [1, 4, 8]
+    print("{} sessions, {} cores".format(SESSIONS, os.cpu_count()))
+    ids = [str(uuid.uuid4()) for _ in range(SESSIONS)]
+    user_id = str(uuid.uuid4())
+    name = "bench_sessions_{}".format(os.getpid())
+    shared = SharedMemorySessionStore(name, capacity=2 * SESSIONS)
+    path = os.path.join(tempfile.mkdtemp(), "sessions.sqlite3")
+    sqlite = SqliteSessionStore(path)
+    for session_id in ids:
+        shared.set(session_id, user_id, 3600)
+    connection = sqlite._connection()
+    connection.execute("BEGIN")
+    for session_id in ids:
+        sqlite.set(session_id, user_id, 3600)
+    connection.execute("COMMIT")
+    try:
+        for processes in counts:
+            run("shared", lambda: SharedMemorySessionStore(name), ids,
+                processes)
+            run("sqlite", lambda: SqliteSessionStore(path), ids, processes)
+    finally:
+        shared.unlink()
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method("fork")
+    main()
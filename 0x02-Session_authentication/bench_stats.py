@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" Benchmark of GET /api/v1/stats polled through the Flask test client
+with basic auth, at 100k users (pass other sizes as arguments): with the
+STATS_TTL cache, with If-None-Match (304), without cache, and the cost of
+keeping the counters up to date in User.save() (journal mode)
+"""
+import base64
+import os
+import sys
+import tempfile
+import time
+
+os.environ["AUTH_TYPE"] = "basic_auth"
+os.chdir(tempfile.mkdtemp())
+
+import api.v1.views.index  # noqa: E402
+import models.base  # noqa: E402
+from api.v1.app import app  # noqa: E402
+from models.base import DATA  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def poll(client, label: str, headers: dict, requests: int = 2000) -> None:
+    """ prints the requests/sec of GET /api/v1/stats """
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get("/api/v1/stats", headers=headers)
+    elapsed = time.perf_counter() - start
+    print("  {:<24} {:>8.0f} req/s ({})".format(
+        label, requests / elapsed, response.status_code))
+
+
+def main() -> None:
+    """ runs the benchmark """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000]
+    client = app.test_client()
+    credentials = base64.b64encode(b"bob@hbtn.io:H0lbertonSchool98!")
+    headers = {"Authorization": "Basic " + credentials.decode()}
+    for size in sizes:
+        DATA["User"] = {}
+        for i in range(size):
+            user = User(email="user{}@domain{}.io".format(i, i % 50))
+            DATA["User"][user.id] = user
+        bob = User(email="bob@hbtn.io")
+        bob.password = "H0lbertonSchool98!"
+        DATA["User"][bob.id] = bob
+        User._reindex()
+        print("{} users".format(size))
+        start = time.perf_counter()
+        User.stats()
+        print("  first stats (counts)     {:>8.3f}s".format(
+            time.perf_counter() - start))
+        api.v1.views.index.STATS_TTL = 1
+        poll(client, "cached", headers)
+        etag = client.get("/api/v1/stats", headers=headers).headers["ETag"]
+        poll(client, "If-None-Match", dict(headers, **{
+            "If-None-Match": etag}))
+        api.v1.views.index.STATS_TTL = 0
+        poll(client, "no cache", headers, 200)
+        models.base.STORAGE_MODE = "journal"
+        start = time.perf_counter()
+        for i in range(2000):
+            bob.email = "bob@domain{}.io".format(i % 60)
+            bob.save()
+        print("  save() with counters    {:>8.1f}us".format(
+            (time.perf_counter() - start) / 2000 * 1e6))
+
+
+if __name__ == "__main__":
+    main()
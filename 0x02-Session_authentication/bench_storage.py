@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+""" Benchmark of User.save() throughput with STORAGE_MODE "file" (full
+rewrite of .db_User.json) against "journal" (append + compaction), for
+1k and 10k existing users (pass other sizes as arguments)
+"""
+import os
+import sys
+import tempfile
+import time
+
+import models.base
+from models.base import DATA
+from models.user import User
+
+
+def main() -> None:
+    """ runs the benchmark """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    os.chdir(tempfile.mkdtemp())
+    for size in sizes:
+        for mode in ("file", "journal"):
+            models.base.STORAGE_MODE = mode
+            User.load_from_file()
+            for i in range(size):
+                user = User(email="user{}@hbtn.io".format(i))
+                DATA["User"][user.id] = user
+            User.save_to_file()
+            users = list(DATA["User"].values())
+            number = min(size, 200)
+            start = time.perf_counter()
+            for user in users[:number]:
+                user.first_name = "Bob"
+                user.save()
+            secs = time.perf_counter() - start
+            print("{:>7} users {:>7}: {:>10,.0f} saves/sec".format(
+                size, mode, number / secs))
+            User.compact()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+""" Stress test and benchmark of the DATA store: reader threads looping
+over User.all() / User.search() while writer threads save and remove
+users. Fails if any thread raises (e.g. "dictionary changed size during
+iteration")
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import models.base
+from models.base import DATA
+from models.user import User
+
+N_USERS = 10000
+DURATION = 3.0
+
+
+def main() -> None:
+    """ runs the stress test """
+    n_readers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_writers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    os.chdir(tempfile.mkdtemp())
+    models.base.STORAGE_MODE = "journal"
+    User.load_from_file()
+    for i in range(N_USERS):
+        user = User(email="user{}@hbtn.io".format(i))
+        DATA["User"][user.id] = user
+    User._reindex()
+
+    errors = []
+    counts = {"reads": 0, "writes": 0}
+    stop = time.monotonic() + DURATION
+
+    def reader():
+        reads = 0
+        try:
+            while time.monotonic() < stop:
+                User.all()
+                User.search({"first_name": "Bob"})
+                reads += 2
+        except Exception as e:
+            errors.append(e)
+        counts["reads"] += reads
+
+    def writer(offset: int):
+        writes = 0
+        try:
+            while time.monotonic() < stop:
+                user = User(email="new{}-{}@hbtn.io".format(offset, writes))
+                user.first_name = "Bob"
+                user.save()
+                user.remove()
+                writes += 2
+        except Exception as e:
+            errors.append(e)
+        counts["writes"] += writes
+
+    threads = [threading.Thread(target=reader) for _ in range(n_readers)]
+    threads += [threading.Thread(target=writer, args=(i,))
+                for i in range(n_writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print("{} readers {} writers: {:,.0f} reads/sec {:,.0f} writes/sec, "
+          "{} errors".format(n_readers, n_writers,
+                             counts["reads"] / DURATION,
+                             counts["writes"] / DURATION, len(errors)))
+    if errors:
+        raise errors[0]
+    assert User.count() == N_USERS
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+""" Benchmark of the serialization of 100k users (pass other sizes as
+arguments): to_json on first call (formatting the timestamps) and on
+later calls (cached), then the GET /api/v1/users body built by jsonify
+and by User.to_json_bytes
+"""
+import sys
+import time
+
+from flask import Flask, jsonify
+
+from models.user import User
+
+
+def timed(label: str, function) -> None:
+    """ prints the duration of function() """
+    start = time.perf_counter()
+    function()
+    print("  {:<22} {:>7.3f}s".format(label, time.perf_counter() - start))
+
+
+def main() -> None:
+    """ runs the benchmark """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000]
+    app = Flask(__name__)
+    for size in sizes:
+        users = []
+        for i in range(size):
+            user = User(email="user{}@hbtn.io".format(i),
+                        first_name="Bob", last_name="Dylan")
+            user.password = "H0lbertonSchool98!"
+            users.append(user)
+        print("{} users".format(size))
+        timed("to_json (first call)",
+              lambda: [user.to_json() for user in users])
+        timed("to_json (cached)", lambda: [user.to_json() for user in users])
+        with app.app_context():
+            timed("jsonify(to_json list)",
+                  lambda: jsonify([user.to_json() for user in users]))
+        timed("to_json_bytes", lambda: User.to_json_bytes(users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+""" Load test of GET /api/v1/users at 1M users (pass other sizes as
+arguments), through the Flask test client with basic auth: the whole
+list, the whole list streamed, the first page and a page deep in the id
+order (limit=100), with the duration and the peak of memory allocated
+(tracemalloc) by each request
+"""
+import base64
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ["AUTH_TYPE"] = "basic_auth"
+os.chdir(tempfile.mkdtemp())
+
+from api.v1.app import app  # noqa: E402
+from models.base import DATA  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def measure(client, label: str, url: str, headers: dict) -> None:
+    """ prints the duration and allocation peak of GET url """
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, headers=headers, buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("  {:<32} {:>8.3f}s peak {:>8.1f} MB body {:>8.1f} MB".format(
+        label, elapsed, peak / 1e6, size / 1e6))
+
+
+def main() -> None:
+    """ runs the load test """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000]
+    client = app.test_client()
+    credentials = base64.b64encode(b"bob@hbtn.io:H0lbertonSchool98!")
+    headers = {"Authorization": "Basic " + credentials.decode()}
+    for size in sizes:
+        DATA["User"] = {}
+        for i in range(size):
+            user = User(email="user{}@hbtn.io".format(i),
+                        first_name="Bob", last_name="Dylan")
+            DATA["User"][user.id] = user
+        bob = User(email="bob@hbtn.io")
+        bob.password = "H0lbertonSchool98!"
+        DATA["User"][bob.id] = bob
+        User._reindex()
+        middle = sorted(DATA["User"])[size // 2]
+        print("{} users".format(size))
+        measure(client, "full list", "/api/v1/users", headers)
+        measure(client, "full list, stream=1", "/api/v1/users?stream=1",
+                headers)
+        measure(client, "first page (sorts ids once)",
+                "/api/v1/users?limit=100", headers)
+        measure(client, "first page", "/api/v1/users?limit=100", headers)
+        measure(client, "middle page",
+                "/api/v1/users?limit=100&after=" + middle, headers)
+        measure(client, "middle page, stream=1",
+                "/api/v1/users?limit=100&stream=1&after=" + middle, headers)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,38 +2,545 @@
 """ Base module
 """
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from itertools import islice
+from typing import (Any, Callable, Dict, Iterator, TypeVar, List,
+                    Iterable, Optional, Tuple)
+from os import getenv, path
+from models.codec import CODECS, EPOCH, from_epoch
+from models.lazy import LazyObjects
+from models.query import Query
+import atexit
+import bisect
 import json
+import os
+import threading
+import time
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+SERIALIZERS = {}
+JSON_ENCODER = json.JSONEncoder(separators=(",", ":"))
+INDEXES = {}
+COUNTERS = {}
+MODELS = {}
+LOCKS = {}
+FILE_LOCKS = {}
+LOCKS_LOCK = threading.Lock()
+
+# "file" rewrites .db_{Class}.json on every save/remove, "journal" appends
+# the change to .db_{Class}.journal and compacts it in the background
+STORAGE_MODE = getenv("STORAGE_MODE", "file")
+JOURNAL_COMPACT_SIZE = int(getenv("JOURNAL_COMPACT_SIZE", str(1 << 20)))
+JOURNALS = {}
+COMPACTIONS = {}
+JOURNAL_LOCK = threading.RLock()
+
+# file format of .db_{Class}.*: "json" (default) or "binary", see
+# models/codec.py
+STORAGE_CODEC = getenv("STORAGE_CODEC", "json")
+
+# when WRITE_BEHIND_WINDOW (seconds) is > 0, concurrent saves/removes are
+# grouped and written once per window or per WRITE_BEHIND_BATCH changes
+WRITE_BEHIND_WINDOW = float(getenv("WRITE_BEHIND_WINDOW", "0"))
+WRITE_BEHIND_BATCH = int(getenv("WRITE_BEHIND_BATCH", "100"))
+COALESCER = None
+COALESCER_LOCK = threading.Lock()
+
+# with LAZY_LOAD=1, load_from_file memory-maps a binary file and builds the
+# objects on first access, keeping at most LAZY_CACHE_SIZE of them that
+# were not saved since (see models/lazy.py)
+LAZY_LOAD = getenv("LAZY_LOAD", "0") == "1"
+LAZY_CACHE_SIZE = int(getenv("LAZY_CACHE_SIZE", "10000"))
+
+
+def format_epochs(epochs: Tuple[float, ...]) -> Tuple[str, ...]:
+    """ Format epoch seconds with TIMESTAMP_FORMAT, equal epochs sharing
+    one string
+    """
+    texts = {}
+    for epoch in epochs:
+        if epoch not in texts:
+            texts[epoch] = time.strftime(TIMESTAMP_FORMAT, time.gmtime(epoch))
+    return tuple(texts[epoch] for epoch in epochs)
+
+
+def collect_stats() -> Dict[str, Any]:
+    """ Return the stats of every model class
+    """
+    result = {}
+    for cls in MODELS.values():
+        result.update(cls.stats())
+    return result
+
+
+def write_atomically(file_path: str, objs: list, durable: bool = False):
+    """ Write objs to file_path with the STORAGE_CODEC codec, through a
+    temporary file renamed over it, so readers and crashes only ever see
+    the old or the new file; durable also fsyncs the data before the rename
+    """
+    tmp_path = "{}.{}.{}.tmp".format(file_path, os.getpid(),
+                                     threading.get_ident())
+    with open(tmp_path, 'wb') as f:
+        CODECS[STORAGE_CODEC].dump(objs, f)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+
+class ReadWriteLock():
+    """ Lock shared by any number of readers or held by one writer
+
+    Waiting writers block new readers, so a steady stream of reads cannot
+    starve writes. Not reentrant.
+    """
+
+    def __init__(self):
+        """ Initialize an unlocked lock
+        """
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """ Hold the lock shared for the block
+        """
+        with self.condition:
+            while self.writer or self.waiting_writers:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if self.readers == 0:
+                    self.condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """ Hold the lock exclusively for the block
+        """
+        with self.condition:
+            self.waiting_writers += 1
+            while self.writer or self.readers:
+                self.condition.wait()
+            self.waiting_writers -= 1
+            self.writer = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writer = False
+                self.condition.notify_all()
+
+
+class WriteGroup():
+    """ Changes written together by a WriteCoalescer; durable submitters
+    hold their group to learn whether its write failed
+    """
+
+    def __init__(self):
+        """ Initialize an empty group
+        """
+        self.pending: Dict[type, List[dict]] = {}
+        self.size = 0
+        self.done = False
+        self.error = None
+
+
+class WriteCoalescer():
+    """ Group commit of saves/removes
+
+    Changes submitted by any thread are queued per class and written by a
+    single background thread: once the first change of a group has waited
+    `window` seconds, or as soon as `batch_size` changes are queued. A
+    durable submit blocks until its group is written (and raises if that
+    write failed), an async one returns at once.
+    """
+
+    def __init__(self, window: float, batch_size: int):
+        """ Initialize an idle coalescer
+        """
+        self.window = window
+        self.batch_size = batch_size
+        self.condition = threading.Condition()
+        self.group = WriteGroup()
+        self.last_group = None
+        self.urgent = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, cls: type, record: dict, durable: bool = True):
+        """ Queue one change of cls, waiting for its write if durable
+        """
+        group = self.enqueue(cls, record)
+        if durable:
+            self.wait(group)
+
+    def enqueue(self, cls: type, record: dict) -> WriteGroup:
+        """ Queue one change of cls, return its group for wait
+        """
+        with self.condition:
+            group = self.group
+            group.pending.setdefault(cls, []).append(record)
+            group.size += 1
+            if group.size == 1 or group.size >= self.batch_size:
+                self.condition.notify_all()
+            return group
+
+    def wait(self, group: WriteGroup):
+        """ Block until group is written, raise the error of its write
+        """
+        with self.condition:
+            self._wait(group)
+
+    def flush(self):
+        """ Write everything submitted so far, without waiting the window
+        """
+        with self.condition:
+            group = self.group if self.group.size else self.last_group
+            if group is not None:
+                self.urgent = True
+                self.condition.notify_all()
+                self._wait(group)
+
+    def _wait(self, group: WriteGroup):
+        """ Block until group is written, raise the error of its write
+        """
+        while not group.done:
+            self.condition.wait()
+        if group.error is not None:
+            raise group.error
+
+    def _run(self):
+        """ Background loop writing one group per iteration
+        """
+        while True:
+            with self.condition:
+                while not self.group.size:
+                    self.condition.wait()
+                deadline = time.monotonic() + self.window
+                while self.group.size < self.batch_size and not self.urgent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                group, self.group = self.group, WriteGroup()
+                self.last_group = group
+                self.urgent = False
+            error = None
+            for cls, records in group.pending.items():
+                try:
+                    cls._write_changes(records)
+                except Exception as e:
+                    error = e
+            with self.condition:
+                group.pending = {}
+                group.error = error
+                group.done = True
+                self.condition.notify_all()
+
+
+def get_coalescer():
+    """ Return the process-wide WriteCoalescer, None if write-behind is off
+    """
+    global COALESCER
+    if WRITE_BEHIND_WINDOW <= 0:
+        return None
+    with COALESCER_LOCK:
+        if COALESCER is None:
+            COALESCER = WriteCoalescer(WRITE_BEHIND_WINDOW,
+                                       WRITE_BEHIND_BATCH)
+            atexit.register(COALESCER.flush)
+        return COALESCER
+
+
+class Index():
+    """ Secondary index of one attribute: value -> {id: None}, an ordered
+    set of the ids holding that value
+
+    The distinct values are also kept sorted, for range queries and
+    ordered walks, once sorted_values was called a first time
+    """
+
+    def __init__(self, attribute: str):
+        """ Initialize an empty index on attribute
+        """
+        self.attribute = attribute
+        self.buckets: Dict[Any, Dict[str, None]] = {}
+        self.values: Dict[str, Any] = {}
+        self.ordered: Optional[List[Any]] = None
+        self.orderable = True
+
+    def add(self, obj: Any):
+        """ Index obj under its current attribute value
+        """
+        self.add_value(obj.id, getattr(obj, self.attribute, None))
+
+    def add_value(self, obj_id: str, value: Any):
+        """ Index obj_id under value
+        """
+        if obj_id in self.values and self.values[obj_id] == value:
+            return
+        self.discard(obj_id)
+        try:
+            bucket = self.buckets.get(value)
+        except TypeError:
+            return
+        if bucket is None:
+            bucket = self.buckets[value] = {}
+            if self.ordered is not None and value is not None:
+                try:
+                    bisect.insort(self.ordered, value)
+                except TypeError:
+                    self.ordered = None
+                    self.orderable = False
+        bucket[obj_id] = None
+        self.values[obj_id] = value
+
+    def discard(self, obj_id: str):
+        """ Drop obj_id from the index, under the value it was added with
+        """
+        if obj_id not in self.values:
+            return
+        value = self.values.pop(obj_id)
+        bucket = self.buckets[value]
+        del bucket[obj_id]
+        if len(bucket) == 0:
+            del self.buckets[value]
+            if self.ordered is not None and value is not None:
+                del self.ordered[bisect.bisect_left(self.ordered, value)]
+
+    def get(self, value: Any) -> Dict[str, None]:
+        """ Ids indexed under value (raises TypeError if unhashable)
+        """
+        return self.buckets.get(value, {})
+
+    def __len__(self) -> int:
+        """ Number of ids indexed
+        """
+        return len(self.values)
+
+    def sorted_values(self) -> Optional[List[Any]]:
+        """ Distinct values but None in ascending order, None if they do
+        not compare with each other
+        """
+        if self.ordered is None and self.orderable:
+            try:
+                self.ordered = sorted(
+                    value for value in self.buckets if value is not None)
+            except TypeError:
+                self.orderable = False
+        return self.ordered
+
+
+class KeyIndex():
+    """ Index of the ids of DATA[class name] with the interface of Index:
+    the mapping already finds an id, so only the sorted ids are kept, for
+    range queries and ordered walks, once sorted_values was called a
+    first time
+    """
+
+    attribute = "id"
+
+    def __init__(self, objs: MutableMapping):
+        """ Initialize over objs (id -> object)
+        """
+        self.objs = objs
+        self.ordered: Optional[List[str]] = None
+
+    def add(self, obj: Any):
+        """ Index obj
+        """
+        self.add_value(obj.id, obj.id)
+
+    def add_value(self, obj_id: str, value: str):
+        """ Index obj_id
+        """
+        if self.ordered is None:
+            return
+        i = bisect.bisect_left(self.ordered, obj_id)
+        if i == len(self.ordered) or self.ordered[i] != obj_id:
+            self.ordered.insert(i, obj_id)
+
+    def discard(self, obj_id: str):
+        """ Drop obj_id from the index
+        """
+        if self.ordered is None:
+            return
+        i = bisect.bisect_left(self.ordered, obj_id)
+        if i < len(self.ordered) and self.ordered[i] == obj_id:
+            del self.ordered[i]
+
+    def get(self, value: Any) -> Tuple[str, ...]:
+        """ Ids indexed under value (raises TypeError if unhashable)
+        """
+        return (value,) if value in self.objs else ()
+
+    def __len__(self) -> int:
+        """ Number of ids indexed
+        """
+        return len(self.objs)
+
+    def sorted_values(self) -> List[str]:
+        """ Ids in ascending order
+        """
+        if self.ordered is None:
+            self.ordered = sorted(self.objs)
+        return self.ordered
+
+
+class Counter():
+    """ Number of objects by key(object), objects whose key is None are
+    not counted
+    """
+
+    def __init__(self, key: Callable[[Any], Any]):
+        """ Initialize an empty counter of key
+        """
+        self.key = key
+        self.counts: Dict[Any, int] = {}
+        self.keys: Dict[str, Any] = {}
+
+    def add(self, obj: Any):
+        """ Count obj under its current key
+        """
+        key = self.key(obj)
+        if key is not None and self.keys.get(obj.id) == key:
+            return
+        self.discard(obj.id)
+        if key is None:
+            return
+        self.keys[obj.id] = key
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def discard(self, obj_id: str):
+        """ Stop counting obj_id
+        """
+        key = self.keys.pop(obj_id, None)
+        if key is None:
+            return
+        if self.counts[key] == 1:
+            del self.counts[key]
+        else:
+            self.counts[key] -= 1
 
 
 class Base():
     """ Base class
+
+    Subclasses list in `indexed_attributes` the attributes that get a
+    secondary index, kept up to date by save/remove/load_from_file and
+    used by query/search for equality, range and prefix lookups and for
+    ordering. id always has one (KeyIndex).
+
+    Every subclass is registered in MODELS. `counters` maps a counter name
+    to a key function: stats() reports the number of objects per key,
+    kept up to date by save/remove once first computed.
+
+    DATA[class name] and the class indexes are guarded by a per-class
+    ReadWriteLock: save/remove/load_from_file write, search/all and the
+    file snapshots read. count/get are single dict operations and take no
+    lock.
+
+    Instances have no __dict__: subclasses must declare their attributes
+    in `__slots__` (`()` if none), appended to the `attributes` of the
+    parent class to give theirs, the attributes of to_json in order. The
+    `epoch_attributes` (created_at/updated_at) are kept as epoch seconds
+    in `_{name}` and read as naive UTC datetimes; other attributes are
+    serialized as is.
+
+    to_json runs a serializer generated once per class, and keeps the
+    formatted timestamps on the instance until the epochs change.
     """
 
+    __slots__ = ("id", "_created_at", "_updated_at", "_timestamps_json")
+    attributes: Tuple[str, ...] = ("id", "created_at", "updated_at")
+    epoch_attributes = frozenset(("created_at", "updated_at"))
+    indexed_attributes: Tuple[str, ...] = ()
+    counters: Dict[str, Callable[[Any], Any]] = {}
+    stats_name: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs: dict):
+        """ Register the subclass in MODELS, named in stats after its
+        lowercase plural by default, with the attributes of its parent
+        followed by its own __slots__
+
+        A subclass without __slots__ would keep its attributes in a
+        __dict__ that is never saved: TypeError
+        """
+        super().__init_subclass__(**kwargs)
+        if "__slots__" not in cls.__dict__:
+            raise TypeError(
+                "{} must declare its attributes in __slots__".format(
+                    cls.__name__))
+        slots = cls.__dict__["__slots__"]
+        if isinstance(slots, str):
+            slots = (slots,)
+        cls.attributes = super(cls, cls).attributes + tuple(slots)
+        if cls.__dict__.get("stats_name") is None:
+            cls.stats_name = "{}s".format(cls.__name__.lower())
+        MODELS[cls.__name__] = cls
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
         s_class = str(self.__class__.__name__)
-        if DATA.get(s_class) is None:
-            DATA[s_class] = {}
+        DATA.setdefault(s_class, {})
 
         self.id = kwargs.get('id', str(uuid.uuid4()))
-        if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
-        else:
-            self.created_at = datetime.utcnow()
-        if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+        created_at = kwargs.get('created_at')
+        updated_at = kwargs.get('updated_at')
+        self._created_at = self._epoch(created_at)
+        if updated_at == created_at:
+            self._updated_at = self._created_at
         else:
-            self.updated_at = datetime.utcnow()
+            self._updated_at = self._epoch(updated_at)
+        self._timestamps_json = None
+
+    @staticmethod
+    def _epoch(value: Any) -> float:
+        """ Convert a timestamp (datetime, TIMESTAMP_FORMAT string or epoch
+        seconds) to epoch seconds, now if value is None
+        """
+        if value is None:
+            return time.time()
+        if isinstance(value, (int, float)):
+            return float(value)
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(value)
+        return (value - EPOCH).total_seconds()
+
+    @property
+    def created_at(self) -> datetime:
+        """ Creation time
+        """
+        return from_epoch(self._created_at)
+
+    @created_at.setter
+    def created_at(self, value: Any):
+        """ Setter of the creation time
+        """
+        self._created_at = self._epoch(value)
+
+    @property
+    def updated_at(self) -> datetime:
+        """ Last update time
+        """
+        return from_epoch(self._updated_at)
+
+    @updated_at.setter
+    def updated_at(self, value: Any):
+        """ Setter of the last update time
+        """
+        self._updated_at = self._epoch(value)
 
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
@@ -47,59 +554,330 @@ class Base():
     def to_json(self, for_serialization: bool = False) -> dict:
         """ Convert the object a JSON dictionary
         """
-        result = {}
-        for key, value in self.__dict__.items():
+        return self.__class__.serializer(for_serialization)(self)
+
+    @classmethod
+    def serializer(cls,
+                   for_serialization: bool = False) -> Callable[[Any], dict]:
+        """ Return the to_json function of the class, generated on first
+        use
+        """
+        serializer = SERIALIZERS.get((cls, for_serialization))
+        if serializer is None:
+            serializer = cls._compile_serializer(for_serialization)
+            SERIALIZERS[(cls, for_serialization)] = serializer
+        return serializer
+
+    @classmethod
+    def _compile_serializer(cls,
+                            for_serialization: bool) -> Callable[[Any], dict]:
+        """ Generate a function building the to_json dictionary of an
+        instance in one dict display: attributes read directly, formatted
+        timestamps taken from _timestamps_json, (epochs, *texts), which is
+        refreshed when the epochs changed
+        """
+        epochs = [key for key in cls.attributes
+                  if key in cls.epoch_attributes]
+        items = []
+        for key in cls.attributes:
             if not for_serialization and key[0] == '_':
                 continue
-            if type(value) is datetime:
-                result[key] = value.strftime(TIMESTAMP_FORMAT)
+            if key in cls.epoch_attributes:
+                value = "cache[{}]".format(epochs.index(key) + 1)
             else:
-                result[key] = value
-        return result
+                value = "self.{}".format(key)
+            items.append("{!r}: {}".format(key, value))
+        source = (
+            "def to_json(self):\n"
+            "    epochs = ({})\n"
+            "    cache = self._timestamps_json\n"
+            "    if cache is None or cache[0] != epochs:\n"
+            "        cache = (epochs,) + format_epochs(epochs)\n"
+            "        self._timestamps_json = cache\n"
+            "    return {{{}}}\n"
+        ).format("".join("self._{}, ".format(key) for key in epochs),
+                 ", ".join(items))
+        namespace = {"format_epochs": format_epochs}
+        exec(compile(source, "<{}.to_json>".format(cls.__name__), "exec"),
+             namespace)
+        return namespace["to_json"]
+
+    @classmethod
+    def to_json_bytes(cls, objs: Iterable[TypeVar('Base')]) -> bytes:
+        """ Encode the to_json of objs as a compact JSON array
+        """
+        serializer = cls.serializer()
+        return JSON_ENCODER.encode([serializer(obj) for obj in objs]).encode()
+
+    @classmethod
+    def iter_json_bytes(cls, objs: Iterable[TypeVar('Base')],
+                        chunk_size: int = 1000) -> Iterator[bytes]:
+        """ Encode the to_json of objs as a compact JSON array, yielded in
+        chunks of chunk_size objects so objs is never held in full
+        """
+        serializer = cls.serializer()
+        objs = iter(objs)
+        separator = b"["
+        while True:
+            chunk = [serializer(obj) for obj in islice(objs, chunk_size)]
+            if len(chunk) == 0:
+                break
+            yield separator + JSON_ENCODER.encode(chunk)[1:-1].encode()
+            separator = b","
+        yield b"[]" if separator == b"[" else b"]"
 
     @classmethod
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from file, then replay the journal if any
+
+        With LAZY_LOAD a binary file is memory-mapped and only indexed
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
-
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+        objs = {}
+        # the newest file wins: a file of another codec is only left over
+        # when a write was interrupted before it was deleted
+        newest = None
+        for name, codec in CODECS.items():
+            file_path = cls._file_path(codec.extension)
+            if not path.exists(file_path):
+                continue
+            key = (os.stat(file_path).st_mtime_ns, name == STORAGE_CODEC)
+            if newest is None or key > newest[0]:
+                newest = (key, file_path, codec)
+        if newest is not None:
+            _, file_path, codec = newest
+            if LAZY_LOAD and codec.random_access:
+                objs = LazyObjects.open(cls, file_path, codec,
+                                        LAZY_CACHE_SIZE)
+            else:
+                with open(file_path, 'rb') as f:
+                    for obj_json in codec.load(f):
+                        obj = cls(**obj_json)
+                        objs[obj.id] = obj
+        cls._replay_journal(objs)
+        with cls._lock().write():
+            DATA[s_class] = objs
+            cls._reindex()
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        # held from the snapshot to the rename: a later snapshot is never
+        # replaced by an older one
+        with cls._file_lock():
+            with cls._lock().read():
+                objs = list(DATA[s_class].values())
+            write_atomically(cls._file_path(), objs)
+            cls._drop_other_codecs()
+        if STORAGE_MODE != "journal":
+            cls._drop_journal()
+
+    @classmethod
+    def _file_path(cls, extension: str = None) -> str:
+        """ Return the path of the file of the class for a codec extension,
+        the STORAGE_CODEC one by default
+        """
+        extension = extension or CODECS[STORAGE_CODEC].extension
+        return ".db_{}.{}".format(cls.__name__, extension)
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def _drop_other_codecs(cls):
+        """ Delete the files of the codecs other than STORAGE_CODEC, now
+        migrated by a full write of the file
+        """
+        for name, codec in CODECS.items():
+            file_path = cls._file_path(codec.extension)
+            if name != STORAGE_CODEC and path.exists(file_path):
+                os.remove(file_path)
 
-    def save(self):
+    @classmethod
+    def _drop_journal(cls):
+        """ Delete journal files left by the journal mode, now folded into
+        a full rewrite of the file
+        """
+        with JOURNAL_LOCK:
+            f = JOURNALS.pop(cls.__name__, None)
+            if f is not None:
+                f.close()
+            for journal_path in cls._journal_paths():
+                if path.exists(journal_path):
+                    os.remove(journal_path)
+
+    @classmethod
+    def _journal_paths(cls) -> Tuple[str, str]:
+        """ Return the paths of the journal being compacted and the live one
+        """
+        journal_path = ".db_{}.journal".format(cls.__name__)
+        return "{}.compacting".format(journal_path), journal_path
+
+    @classmethod
+    def _replay_journal(cls, objs: MutableMapping):
+        """ Apply the journal records on top of objs (id -> object)
+
+        A half written last line (crash during append) is cut off
+        """
+        for journal_path in cls._journal_paths():
+            if not path.exists(journal_path):
+                continue
+            with open(journal_path, 'rb+') as f:
+                offset = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("torn record")
+                        record = json.loads(line)
+                    except ValueError:
+                        f.truncate(offset)
+                        break
+                    offset += len(line)
+                    if "save" in record:
+                        obj = cls(**record["save"])
+                        objs[obj.id] = obj
+                    else:
+                        objs.pop(record["remove"], None)
+
+    @classmethod
+    def _append_to_journal(cls, records: List[dict]):
+        """ Append changes to the journal in one write, starting a
+        background compaction once it grows past JOURNAL_COMPACT_SIZE
+        """
+        s_class = cls.__name__
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        with JOURNAL_LOCK:
+            f = JOURNALS.get(s_class)
+            if f is None:
+                f = open(cls._journal_paths()[1], 'a')
+                JOURNALS[s_class] = f
+            f.write(lines)
+            f.flush()
+            if f.tell() < JOURNAL_COMPACT_SIZE:
+                return
+            compaction = COMPACTIONS.get(s_class)
+            if compaction is not None and compaction.is_alive():
+                return
+            compaction = threading.Thread(target=cls.compact, daemon=True)
+            COMPACTIONS[s_class] = compaction
+            compaction.start()
+
+    @classmethod
+    def _write_changes(cls, records: List[dict]):
+        """ Persist changes of the class with the current STORAGE_MODE
+        """
+        if STORAGE_MODE == "journal":
+            cls._append_to_journal(records)
+        else:
+            cls.save_to_file()
+
+    @classmethod
+    def _record_change(cls, record: dict) -> Optional[WriteGroup]:
+        """ Journal one change, or queue it to the write-behind coalescer
+        when enabled, returning its group; called under the write lock of
+        the class so changes are recorded in the order they were applied
+        """
+        coalescer = get_coalescer()
+        if coalescer is not None:
+            return coalescer.enqueue(cls, record)
+        if STORAGE_MODE == "journal":
+            cls._append_to_journal([record])
+        return None
+
+    @classmethod
+    def _persist(cls, group: Optional[WriteGroup], durable: bool):
+        """ Finish persisting a change recorded by _record_change, once
+        the write lock is released: rewrite the file in file mode, wait
+        for the coalescer if durable
+        """
+        coalescer = get_coalescer()
+        if coalescer is not None:
+            if durable:
+                coalescer.wait(group)
+        elif STORAGE_MODE != "journal":
+            cls.save_to_file()
+
+    @classmethod
+    def compact(cls):
+        """ Fold the journal into .db_{Class}.json
+
+        The live journal is renamed aside (new changes go to a fresh one)
+        while the snapshot is taken, the snapshot is written next to the
+        file and renamed over it, then the folded journal is deleted.
+        Replaying a leftover folded journal is harmless: records hold full
+        object states.
+        """
+        s_class = cls.__name__
+        compacting_path, journal_path = cls._journal_paths()
+        with cls._file_lock():
+            # the class lock is taken before JOURNAL_LOCK, as save/remove
+            # append under it
+            with cls._lock().read(), JOURNAL_LOCK:
+                f = JOURNALS.pop(s_class, None)
+                if f is not None:
+                    f.close()
+                if path.exists(journal_path):
+                    os.replace(journal_path, compacting_path)
+                objs = list(DATA[s_class].values())
+            write_atomically(cls._file_path(), objs, durable=True)
+            cls._drop_other_codecs()
+        if path.exists(compacting_path):
+            os.remove(compacting_path)
+
+    def save(self, durable: bool = True):
         """ Save current object
+
+        With write-behind enabled, durable=False returns before the
+        change is written to disk
         """
         s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        self._updated_at = time.time()
+        with self.__class__._lock().write():
+            DATA[s_class][self.id] = self
+            for index in self.__class__._indexes().values():
+                index.add(self)
+            for counter in COUNTERS.get(s_class, {}).values():
+                counter.add(self)
+            record = {}
+            if STORAGE_MODE == "journal":
+                record = {"save": self.to_json(True)}
+            group = self.__class__._record_change(record)
+        self.__class__._persist(group, durable)
 
-    def remove(self):
+    def remove(self, durable: bool = True):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        with self.__class__._lock().write():
+            if DATA[s_class].pop(self.id, None) is None:
+                return
+            for index in self.__class__._indexes().values():
+                index.discard(self.id)
+            for counter in COUNTERS.get(s_class, {}).values():
+                counter.discard(self.id)
+            group = self.__class__._record_change({"remove": self.id})
+        self.__class__._persist(group, durable)
+
+    @classmethod
+    def _lock(cls) -> ReadWriteLock:
+        """ Return the lock guarding the objects of the class
+        """
+        s_class = cls.__name__
+        lock = LOCKS.get(s_class)
+        if lock is None:
+            with LOCKS_LOCK:
+                lock = LOCKS.setdefault(s_class, ReadWriteLock())
+        return lock
+
+    @classmethod
+    def _file_lock(cls) -> threading.Lock:
+        """ Return the lock held from a snapshot of the class to its write
+        """
+        s_class = cls.__name__
+        lock = FILE_LOCKS.get(s_class)
+        if lock is None:
+            with LOCKS_LOCK:
+                lock = FILE_LOCKS.setdefault(s_class, threading.Lock())
+        return lock
 
     @classmethod
     def count(cls) -> int:
@@ -121,17 +899,83 @@ class Base():
         s_class = cls.__name__
         return DATA[s_class].get(id)
 
+    @classmethod
+    def _indexes(cls) -> Dict[str, Index]:
+        """ Return the secondary indexes of the class by attribute,
+        building them from DATA on first use
+        """
+        s_class = cls.__name__
+        indexes = INDEXES.get(s_class)
+        if indexes is None:
+            indexes = {attr: Index(attr) for attr in cls.indexed_attributes}
+            objs = DATA.setdefault(s_class, {})
+            for attr, index in indexes.items():
+                if isinstance(objs, LazyObjects):
+                    for obj_id, value in objs.index_values(attr):
+                        index.add_value(obj_id, value)
+                else:
+                    for obj in objs.values():
+                        index.add(obj)
+            indexes["id"] = KeyIndex(objs)
+            INDEXES[s_class] = indexes
+        return indexes
+
+    @classmethod
+    def _reindex(cls):
+        """ Rebuild the secondary indexes from DATA, and the counters on
+        next use
+        """
+        INDEXES.pop(cls.__name__, None)
+        COUNTERS.pop(cls.__name__, None)
+        cls._indexes()
+
+    @classmethod
+    def _counters(cls) -> Dict[str, Counter]:
+        """ Return the counters of the class by name, computed from DATA
+        on first use
+        """
+        s_class = cls.__name__
+        counters = COUNTERS.get(s_class)
+        if counters is None:
+            counters = {name: Counter(key)
+                        for name, key in cls.counters.items()}
+            for obj in DATA.get(s_class, {}).values():
+                for counter in counters.values():
+                    counter.add(obj)
+            COUNTERS[s_class] = counters
+        return counters
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """ Return {stats_name: count} and, for every counter,
+        {"{stats_name}_{counter}": {key: count}}
+        """
+        s_class = cls.__name__
+        with cls._lock().read():
+            result = {cls.stats_name: len(DATA.get(s_class, {}))}
+            for name, counter in cls._counters().items():
+                key = "{}_{}".format(cls.stats_name, name)
+                result[key] = dict(counter.counts)
+        return result
+
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
+
+        Equality on an indexed attribute only scans the matching bucket
         """
-        s_class = cls.__name__
-        def _search(obj):
-            if len(attributes) == 0:
-                return True
-            for k, v in attributes.items():
-                if (getattr(obj, k) != v):
-                    return False
-            return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+        return list(cls.query(attributes))
+
+    @classmethod
+    def query(cls, where: dict = None, order_by: str = None,
+              limit: int = None, offset: int = 0,
+              fields: Iterable[str] = None) -> Iterator[Any]:
+        """ Return a lazy iterator over the objects matching where
+        (attribute -> value, Range or Prefix), ordered by order_by
+        ("attr" or "-attr"), sliced by offset/limit and, when fields are
+        given, projected to dicts of these to_json keys
+
+        See models/query.py for the predicates and the index use
+        """
+        return iter(Query(cls, DATA[cls.__name__], where, order_by, limit,
+                          offset, fields))
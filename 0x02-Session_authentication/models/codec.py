@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+""" Codec module: file formats of the models storage
+"""
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator
+import calendar
+import json
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(value: datetime) -> int:
+    """ Convert a naive UTC datetime to epoch seconds
+    """
+    return calendar.timegm(value.timetuple())
+
+
+def from_epoch(value: int) -> datetime:
+    """ Convert epoch seconds to a naive UTC datetime
+    """
+    return EPOCH + timedelta(seconds=value)
+
+
+class JsonCodec():
+    """ The original format: one JSON object mapping id -> to_json(True)
+    """
+
+    name = "json"
+    extension = "json"
+    random_access = False
+
+    def dump(self, objs: Iterable[Any], f: BinaryIO):
+        """ Write objs to f
+        """
+        objs_json = {obj.id: obj.to_json(True) for obj in objs}
+        f.write(json.dumps(objs_json).encode())
+
+    def load(self, f: BinaryIO) -> Iterator[Dict[str, Any]]:
+        """ Yield the constructor kwargs of every object in f
+        """
+        return iter(json.load(f).values())
+
+
+class BinaryCodec():
+    """ Compact format: a header (magic, format version, payload encoding)
+    then one length-prefixed record per object. Records are msgpack maps
+    when msgpack is installed, compact JSON otherwise; datetimes are
+    stored as epoch seconds
+    """
+
+    name = "binary"
+    extension = "bin"
+    random_access = True
+    MAGIC = b"HBDB"
+    VERSION = 1
+    HEADER = struct.Struct("<4sBB")
+    LENGTH = struct.Struct("<I")
+    PAYLOAD_JSON = 0
+    PAYLOAD_MSGPACK = 1
+
+    def dump(self, objs: Iterable[Any], f: BinaryIO):
+        """ Write objs to f
+        """
+        if msgpack is not None:
+            payload, encode = self.PAYLOAD_MSGPACK, msgpack.packb
+        else:
+            payload = self.PAYLOAD_JSON
+            encoder = json.JSONEncoder(separators=(",", ":"))
+
+            def encode(obj_dict: dict) -> bytes:
+                return encoder.encode(obj_dict).encode()
+
+        f.write(self.HEADER.pack(self.MAGIC, self.VERSION, payload))
+        pack_length = self.LENGTH.pack
+        for obj in objs:
+            obj_dict = {}
+            for key in obj.attributes:
+                if key in obj.epoch_attributes:
+                    obj_dict[key] = int(getattr(obj, "_" + key))
+                    continue
+                value = getattr(obj, key)
+                if type(value) is datetime:
+                    value = to_epoch(value)
+                obj_dict[key] = value
+            record = encode(obj_dict)
+            f.write(pack_length(len(record)))
+            f.write(record)
+
+    def decoder(self, data: bytes) -> Callable[[bytes], Dict[str, Any]]:
+        """ Check the header of data and return its record decoder
+        """
+        magic, version, payload = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("not a version {} {} file".format(
+                self.VERSION, self.name))
+        if payload == self.PAYLOAD_MSGPACK:
+            if msgpack is None:
+                raise ValueError("msgpack is needed to read this file")
+            return msgpack.unpackb
+        return json.loads
+
+    def offsets(self, data: bytes) -> Iterator[int]:
+        """ Yield the offset of every record in data (a bytes-like object,
+        e.g. a mmap of the file)
+        """
+        offset = self.HEADER.size
+        unpack_length = self.LENGTH.unpack_from
+        length_size = self.LENGTH.size
+        while offset < len(data):
+            yield offset
+            (length,) = unpack_length(data, offset)
+            offset += length_size + length
+
+    def record_at(self, data: bytes, offset: int,
+                  decode: Callable[[bytes], Dict[str, Any]]) -> Dict[str, Any]:
+        """ Decode the record at offset in data
+        """
+        (length,) = self.LENGTH.unpack_from(data, offset)
+        offset += self.LENGTH.size
+        return decode(data[offset:offset + length])
+
+    def load(self, f: BinaryIO) -> Iterator[Dict[str, Any]]:
+        """ Yield the constructor kwargs of every object in f
+        """
+        data = f.read()
+        decode = self.decoder(data)
+        for offset in self.offsets(data):
+            yield self.record_at(data, offset, decode)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec(), BinaryCodec())}
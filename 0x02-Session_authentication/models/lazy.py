@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+""" Lazy module: objects of a memory-mapped file, built on first access
+"""
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Tuple
+import mmap
+import threading
+
+
+class LazyObjects(MutableMapping):
+    """ Mapping id -> object over a memory-mapped file of a random access
+    codec (see models/codec.py)
+
+    Opening the file only records the offset of every object and the raw
+    values of the indexed attributes; an object is built when it is first
+    looked up and kept in a bounded LRU cache. Objects stored since (saved
+    or replayed from the journal) are held until removed, like in a dict.
+
+    Lookups take no lock: a record is looked up through `objects` then
+    `offsets`, which save/remove update in the reverse order, and the
+    cache is only read for ids still in `offsets`.
+    """
+
+    def __init__(self, cls: type, data: bytes, codec: Any,
+                 offsets: Dict[str, int], values: Dict[str, Dict[str, Any]],
+                 cache_size: int):
+        """ Initialize over data with offsets (id -> record offset) and
+        values (indexed attribute -> id -> value)
+        """
+        self.cls = cls
+        self.data = data
+        self.codec = codec
+        self.decode = codec.decoder(data)
+        self.offsets = offsets
+        self.indexed = values
+        self.objects: Dict[str, Any] = {}
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, obj_class: type, file_path: str, codec: Any,
+             cache_size: int) -> 'LazyObjects':
+        """ Map file_path and index its records by id
+        """
+        with open(file_path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        decode = codec.decoder(data)
+        offsets = {}
+        values = {attr: {} for attr in obj_class.indexed_attributes}
+        for offset in codec.offsets(data):
+            record = codec.record_at(data, offset, decode)
+            obj_id = record["id"]
+            offsets[obj_id] = offset
+            for attr, attr_values in values.items():
+                attr_values[obj_id] = record.get(attr)
+        return cls(obj_class, data, codec, offsets, values, cache_size)
+
+    def index_values(self, attribute: str) -> Iterator[Tuple[str, Any]]:
+        """ Yield (id, value of attribute) of every object without
+        building the ones still only in the file
+        """
+        attr_values = self.indexed.get(attribute, {})
+        for obj_id in self.offsets:
+            yield obj_id, attr_values.get(obj_id)
+        for obj_id, obj in self.objects.items():
+            yield obj_id, getattr(obj, attribute, None)
+
+    def __getitem__(self, obj_id: str) -> Any:
+        """ Return the object of obj_id, built from the file if needed
+        """
+        obj = self.objects.get(obj_id)
+        if obj is not None:
+            return obj
+        offset = self.offsets.get(obj_id)
+        if offset is None:
+            return self.objects[obj_id]
+        with self.cache_lock:
+            obj = self.cache.get(obj_id)
+            if obj is not None:
+                self.cache.move_to_end(obj_id)
+                return obj
+        obj = self.cls(**self.codec.record_at(self.data, offset, self.decode))
+        with self.cache_lock:
+            self.cache[obj_id] = obj
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return obj
+
+    def __setitem__(self, obj_id: str, obj: Any):
+        """ Store obj, which now replaces the record of the file
+        """
+        self.objects[obj_id] = obj
+        self._forget(obj_id)
+
+    def __delitem__(self, obj_id: str):
+        """ Remove obj_id
+        """
+        found = self.offsets.get(obj_id) is not None
+        self._forget(obj_id)
+        if self.objects.pop(obj_id, None) is None and not found:
+            raise KeyError(obj_id)
+
+    def _forget(self, obj_id: str):
+        """ Drop what the file held for obj_id
+        """
+        if self.offsets.pop(obj_id, None) is None:
+            return
+        for attr_values in self.indexed.values():
+            attr_values.pop(obj_id, None)
+        with self.cache_lock:
+            self.cache.pop(obj_id, None)
+
+    def __contains__(self, obj_id: Any) -> bool:
+        """ Whether obj_id is stored, without building it
+        """
+        return obj_id in self.objects or obj_id in self.offsets
+
+    def __iter__(self) -> Iterator[str]:
+        """ Iterate over the ids, the ones of the file first
+        """
+        yield from list(self.offsets)
+        yield from list(self.objects)
+
+    def __len__(self) -> int:
+        """ Number of objects, without building them
+        """
+        return len(self.offsets) + len(self.objects)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+""" Query module: predicates and planner of Base.query
+"""
+from itertools import islice
+from operator import attrgetter
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import bisect
+import heapq
+
+
+class Range():
+    """ Predicate low <= value < high, a missing bound is open. None never
+    matches
+    """
+
+    def __init__(self, low: Any = None, high: Any = None):
+        """ Initialize with the bounds
+        """
+        self.low = low
+        self.high = high
+
+    def bounds(self) -> Tuple[Any, Any]:
+        """ Return (low, high), the bounds of the values in order
+        """
+        return self.low, self.high
+
+    def match(self, value: Any) -> bool:
+        """ Whether value is in the range
+        """
+        if value is None:
+            return False
+        if self.low is not None and value < self.low:
+            return False
+        return self.high is None or value < self.high
+
+    def __repr__(self) -> str:
+        """ Representation
+        """
+        return "Range({!r}, {!r})".format(self.low, self.high)
+
+
+class Prefix(Range):
+    """ Predicate on strings starting with prefix
+    """
+
+    def __init__(self, prefix: str):
+        """ Initialize with the prefix, as the range of the strings from
+        prefix to the first one after all those starting with it
+        """
+        high = None
+        if prefix and ord(prefix[-1]) < 0x10ffff:
+            high = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        super().__init__(prefix, high)
+        self.prefix = prefix
+
+    def match(self, value: Any) -> bool:
+        """ Whether value starts with the prefix
+        """
+        return isinstance(value, str) and value.startswith(self.prefix)
+
+    def __repr__(self) -> str:
+        """ Representation
+        """
+        return "Prefix({!r})".format(self.prefix)
+
+
+class Query():
+    """ Lazy query over the objects of a class
+
+    where maps attribute -> value (equality), Range or Prefix, all
+    predicates must hold. The planner reads, in this order of preference:
+    - the bucket of an equality on an indexed attribute (smallest one),
+    - the values of an indexed attribute in a Range/Prefix, in order,
+    - every value of the indexed order_by attribute, in order,
+    - every object.
+    Results are sorted (or only the first offset + limit selected) when
+    the path read does not give the order_by order already, otherwise they
+    stream and limit stops the read early.
+
+    Index walks hold the class read lock for one batch of values at a
+    time and resume after the last value seen, so callers may save or
+    remove objects while iterating.
+    """
+
+    BATCH = 256
+
+    def __init__(self, cls: type, objs: Any, where: dict = None,
+                 order_by: str = None, limit: int = None, offset: int = 0,
+                 fields: Iterable[str] = None):
+        """ Initialize the query of cls over objs (DATA[class name])
+
+        order_by is an attribute name, prefixed by "-" for descending
+        order (None values sort last, first when descending); fields
+        projects each result to a dict of these to_json keys
+        """
+        self.cls = cls
+        self.objs = objs
+        self.where = dict(where or {})
+        self.order_by = order_by
+        self.descending = False
+        if order_by is not None and order_by.startswith("-"):
+            self.order_by = order_by[1:]
+            self.descending = True
+        self.limit = limit
+        self.offset = offset
+        self.fields = tuple(fields) if fields is not None else None
+
+    def __iter__(self) -> Iterator[Any]:
+        """ Run the query
+        """
+        candidates, ordered = self._plan()
+        results = candidates
+        if self.where:
+            results = filter(self._match, candidates)
+        stop = None if self.limit is None else self.offset + self.limit
+        if self.order_by is not None and not ordered:
+            results = iter(self._sort(list(results), stop))
+        results = islice(results, self.offset, stop)
+        if self.fields is None:
+            return results
+        return map(self._project, results)
+
+    def _sort(self, results: List[Any], stop: Optional[int]) -> List[Any]:
+        """ Return results in the order_by order, only the first stop ones
+        when stop is given. The values are compared directly, and again
+        with None values moved last if some are None
+        """
+        attr = self.order_by
+
+        def none_last(obj: Any) -> Tuple[bool, Any]:
+            value = getattr(obj, attr)
+            return value is None, value
+        for key in (attrgetter(attr), none_last):
+            try:
+                if stop is None:
+                    return sorted(results, key=key, reverse=self.descending)
+                if self.descending:
+                    return heapq.nlargest(stop, results, key=key)
+                return heapq.nsmallest(stop, results, key=key)
+            except TypeError:
+                if key is none_last:
+                    raise
+
+    def _match(self, obj: Any) -> bool:
+        """ Whether obj satisfies every predicate
+        """
+        for k, v in self.where.items():
+            value = getattr(obj, k)
+            if isinstance(v, Range):
+                if not v.match(value):
+                    return False
+            elif value != v:
+                return False
+        return True
+
+    def _project(self, obj: Any) -> dict:
+        """ Return the fields of the to_json of obj
+        """
+        obj_json = self.cls.serializer()(obj)
+        return {field: obj_json[field] for field in self.fields}
+
+    def _plan(self) -> Tuple[Iterator[Any], bool]:
+        """ Return the candidate objects and whether they come in the
+        order_by order
+        """
+        with self.cls._lock().read():
+            indexes = self.cls._indexes()
+            bucket = None
+            for k, v in self.where.items():
+                if k not in indexes or isinstance(v, Range):
+                    continue
+                try:
+                    ids = indexes[k].get(v)
+                except TypeError:
+                    continue
+                if bucket is None or len(ids) < len(bucket):
+                    bucket = ids
+                    ordered = self.order_by in (None, k)
+            if bucket is not None:
+                return self._resolve(list(bucket)), ordered
+            for k, v in self.where.items():
+                if (k in indexes and isinstance(v, Range)
+                        and indexes[k].sorted_values() is not None):
+                    ordered = self.order_by in (None, k)
+                    walk = self._walk(indexes[k], v.bounds(),
+                                      ordered and self.descending)
+                    return self._resolve(walk), ordered
+            index = indexes.get(self.order_by)
+            if (index is not None and index.sorted_values() is not None
+                    and len(index) == len(self.objs)):
+                walk = self._walk(index, None, self.descending)
+                return self._resolve(walk), True
+            return iter(list(self.objs.values())), self.order_by is None
+
+    def _resolve(self, ids: Iterable[str]) -> Iterator[Any]:
+        """ Yield the objects of ids still stored
+        """
+        get = self.objs.get
+        for obj_id in ids:
+            obj = get(obj_id)
+            if obj is not None:
+                yield obj
+
+    def _walk(self, index: Any, bounds: Optional[Tuple[Any, Any]],
+              descending: bool) -> Iterator[str]:
+        """ Yield the ids of index in value order, the values within
+        bounds (low, high) or all of them including None when bounds is
+        None
+        """
+        low, high = bounds or (None, None)
+        none_ids: List[str] = []
+        if bounds is None:
+            with self.cls._lock().read():
+                none_ids = list(index.get(None))
+        if descending:
+            yield from none_ids
+        last = None
+        while True:
+            with self.cls._lock().read():
+                values = index.sorted_values()
+                if values is None:
+                    raise TypeError("values of {} do not compare".format(
+                        index.attribute))
+                batch = self._batch(values, low, high, last, descending)
+                ids = [obj_id for value in batch
+                       for obj_id in index.get(value)]
+            if len(batch) == 0:
+                break
+            yield from ids
+            last = batch[-1:]
+        if not descending:
+            yield from none_ids
+
+    def _batch(self, values: List[Any], low: Any, high: Any,
+               last: Optional[List[Any]], descending: bool) -> List[Any]:
+        """ Return the next BATCH values within [low, high) after last
+        (a one value list, None to start), in the walk direction
+        """
+        if not descending:
+            if last is not None:
+                start = bisect.bisect_right(values, last[0])
+            elif low is not None:
+                start = bisect.bisect_left(values, low)
+            else:
+                start = 0
+            batch = values[start:start + self.BATCH]
+            if high is not None:
+                batch = batch[:bisect.bisect_left(batch, high)]
+            return batch
+        if last is not None:
+            end = bisect.bisect_left(values, last[0])
+        elif high is not None:
+            end = bisect.bisect_left(values, high)
+        else:
+            end = len(values)
+        batch = values[max(end - self.BATCH, 0):end]
+        if low is not None:
+            batch = batch[bisect.bisect_left(batch, low):]
+        return batch[::-1]
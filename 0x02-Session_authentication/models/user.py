@@ -5,10 +5,22 @@ import hashlib
 from models.base import Base
 
 
+def email_domain(user: 'User') -> str:
+    """ Domain of the email of user, None without one
+    """
+    if not isinstance(user.email, str) or "@" not in user.email:
+        return None
+    return user.email.rpartition("@")[2].lower()
+
+
 class User(Base):
     """ User class
     """
 
+    __slots__ = ("email", "_password", "first_name", "last_name")
+    indexed_attributes = ("email",)
+    counters = {"by_domain": email_domain}
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
         """